@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from fastapi import Request, Response
+from app.config import settings
+from app.api.pagination import NEXT_CURSOR_HEADER
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+class EncodedEntry:
+    __slots__ = ("bodies", "next_cursor")
+
+    def __init__(self, rows, next_cursor):
+        body = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.bodies = {"identity": body}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=5)
+        self.next_cursor = next_cursor
+
+
+class EncodedResponseCache:
+    """
+    Encoded (and pre-compressed) JSON bodies of catalog pages, per catalog
+    version. A new catalog version drops everything; within a version
+    entries are evicted LRU beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._version = None
+        self._entries = OrderedDict()
+
+    def get(self, version: str, key: tuple, build):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = EncodedEntry(*build())
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+
+        return entry
+
+
+encoded_cache = EncodedResponseCache(settings.ENCODED_CACHE_MAX_ENTRIES)
+
+
+def _pick_encoding(request: Request, entry: EncodedEntry):
+    accepted = request.headers.get("accept-encoding", "")
+    for encoding in ("br", "gzip"):
+        if encoding in entry.bodies and encoding in accepted:
+            return encoding
+    return "identity"
+
+
+def _etag(base: str, encoding: str):
+    # Strong validators must differ between content codings
+    return f'"{base}"' if encoding == "identity" else f'"{base}-{encoding}"'
+
+
+def _matching_etag(if_none_match: str, base: str):
+    """
+    The If-None-Match tag naming any coding of `base` (weak or strong), or None
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return _etag(base, "identity")
+        opaque = tag.removeprefix("W/").strip('"')
+        if opaque == base or opaque.startswith(base + "-"):
+            return tag
+    return None
+
+
+def catalog_response(request: Request, catalog, key: tuple, build):
+    """
+    Serve a catalog page as cached JSON bytes with a strong ETag per
+    content coding. The ETag is derived from the catalog version, the
+    request key and the coding only, so If-None-Match (any coding) is
+    answered with 304 before anything is built.
+    `build` returns (rows, next_cursor) and only runs on a cache miss.
+    """
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+    base = f"{catalog.version}-{digest}"
+    headers = {
+        "Cache-Control": f"public, max-age={settings.CATALOG_CACHE_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    matched = _matching_etag(if_none_match, base) if if_none_match else None
+    if matched:
+        headers["ETag"] = matched
+        return Response(status_code=304, headers=headers)
+
+    entry = encoded_cache.get(catalog.version, key, build)
+    if entry.next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = str(entry.next_cursor)
+
+    encoding = _pick_encoding(request, entry)
+    headers["ETag"] = _etag(base, encoding)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    return Response(
+        content=entry.bodies[encoding],
+        media_type="application/json",
+        headers=headers,
+    )
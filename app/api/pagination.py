@@ -0,0 +1,63 @@
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+from app.db.session import fetch_rows
+
+# Page size bounds shared by the listing endpoints
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# Header carrying the keyset cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_fields(fields: str | None, allowed: list[str]):
+    """
+    Validate a sparse field selection (?fields=id,title).
+    Returns None for "all fields"; `id` is always included since it's
+    the pagination key.
+    """
+    if not fields:
+        return None
+
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+
+    if "id" not in names:
+        names = ["id"] + names
+
+    return names
+
+
+def select_fields(model, names: list[str] | None, allowed: list[str]):
+    """
+    SELECT of only the requested columns
+    """
+    return select(*[getattr(model, n) for n in (names or allowed)])
+
+
+def set_next_cursor(response: Response, next_cursor):
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
+
+
+async def fetch_page(query, key_column, limit: int, after: int | None, response: Response):
+    """
+    Keyset pagination: WHERE key > after ORDER BY key LIMIT limit.
+    Fetches one extra row to know whether there's a next page.
+    """
+    if after is not None:
+        query = query.where(key_column > after)
+
+    rows = await fetch_rows(query.order_by(key_column).limit(limit + 1))
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, rows[-1]["id"])
+
+    return rows
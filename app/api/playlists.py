@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
-from app.db.session import get_db
+from fastapi import APIRouter, Query, Request, Response
+from app.db.session import fetch_rows
 from app.db.models import Playlist
+from app.api.pagination import parse_fields, select_fields, fetch_page, DEFAULT_LIMIT, MAX_LIMIT
+from app.api.encoded import catalog_response
+from app.services.catalog import catalog_store, PLAYLIST_FIELDS
 
 router = APIRouter(
     prefix="/playlists",
@@ -10,16 +12,42 @@ router = APIRouter(
 
 
 @router.get("/")
-async def get_playlists(db=Depends(get_db)):
-    query = await db.execute(select(Playlist))
-    playlists = query.scalars().all()
-    return playlists
+async def get_playlists(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: int | None = None,
+    fields: str | None = None,
+):
+    """
+    Playlists ordered by id, one page at a time.
+    Pass the X-Next-Cursor response header back as `after` for the next page;
+    `fields` selects a subset of columns (e.g. ?fields=id,name).
+    Served from the in-memory catalog as pre-encoded JSON with an ETag
+    (304 on If-None-Match); the DB is only hit while the catalog is cold.
+    """
+    names = parse_fields(fields, PLAYLIST_FIELDS)
+
+    catalog = catalog_store.current
+    if catalog:
+        return catalog_response(
+            request,
+            catalog,
+            ("playlists", limit, after, tuple(names or ())),
+            lambda: catalog.page_playlists(limit, after, names),
+        )
+
+    query = select_fields(Playlist, names, PLAYLIST_FIELDS)
+    return await fetch_page(query, Playlist.id, limit, after, response)
 
 
 @router.get("/{playlist_id}")
-async def get_playlist(playlist_id: int, db=Depends(get_db)):
-    query = await db.execute(
-        select(Playlist).where(Playlist.id == playlist_id)
+async def get_playlist(playlist_id: int):
+    catalog = catalog_store.current
+    if catalog:
+        return catalog.playlist(playlist_id)
+
+    rows = await fetch_rows(
+        select_fields(Playlist, None, PLAYLIST_FIELDS).where(Playlist.id == playlist_id)
     )
-    playlist = query.scalar_one_or_none()
-    return playlist
+    return rows[0] if rows else None
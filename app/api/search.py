@@ -0,0 +1,37 @@
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query
+from app.services.catalog import catalog_store
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"]
+)
+
+
+@router.get("/")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    type: Literal["playlist", "video"] | None = None
+):
+    """
+    Ranked search over playlist names / descriptions and video titles of
+    the whole channel. Arabic text is normalized (diacritics, tatweel,
+    alef / ya / ta-marbuta forms), and the last word may be a prefix.
+    """
+    catalog = catalog_store.current
+    if catalog is None:
+        try:
+            catalog = await catalog_store.load(if_missing=True)
+        except Exception:
+            raise HTTPException(status_code=503, detail="Search index is not ready yet")
+
+    results, total = catalog.search(q, limit, offset, type)
+
+    return {
+        "query": q,
+        "total": total,
+        "next_offset": offset + limit if offset + limit < total else None,
+        "results": results,
+    }
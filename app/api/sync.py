@@ -1,5 +1,5 @@
-from fastapi import APIRouter
-from app.services.youtube_sync import sync_playlists_and_videos
+from fastapi import APIRouter, HTTPException
+from app.services.sync_runner import sync_runner
 
 router = APIRouter(
     prefix="/sync",
@@ -7,7 +7,24 @@ router = APIRouter(
 )
 
 
-@router.get("/")
-async def run_sync():
-    await sync_playlists_and_videos()
-    return {"status": "Sync completed"}
+@router.api_route("/", methods=["GET", "POST"], status_code=202)
+async def run_sync(warm: bool | None = None):
+    """
+    Start a metadata-only sync in the background; `warm` overrides
+    SYNC_WARM_NEW_VIDEOS. If a sync is already running in this worker its
+    job is returned; one running on another worker makes this job "skipped".
+    Poll /sync/{job_id} for the outcome.
+    """
+    job = await sync_runner.trigger("api", warm)
+    return job.as_dict()
+
+
+@router.get("/{job_id}")
+async def get_sync_status(job_id: str):
+    """
+    Status and stats of a sync job
+    """
+    status = await sync_runner.status(job_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return status
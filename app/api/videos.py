@@ -1,9 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from app.db.session import get_db
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+import asyncio
+import json
+from fastapi.responses import RedirectResponse, StreamingResponse, FileResponse
+import httpx
+from app.config import settings
+from app.db.session import fetch_rows
 from app.db.models import Video
-from app.services.downloader import get_video_links
-from pydantic import BaseModel
+from app.api.pagination import parse_fields, select_fields, fetch_page, DEFAULT_LIMIT, MAX_LIMIT
+from app.api.encoded import catalog_response
+from app.services.catalog import catalog_store, VIDEO_FIELDS
+from app.services.downloader import (
+    resolve_video_links,
+    resolve_audio_url,
+    is_resolving,
+    VideoUnavailable,
+)
+from app.services.url_cache import url_cache
+from app.services.prefetch import prefetcher
+from app.services.audio_cache import audio_cache
+from app.services.admission import admission, RateLimited, Overloaded
+from app.services.circuit_breaker import extractor_circuit, CircuitOpen
+from app.services.stream_relay import (
+    stream_relay,
+    TooManyStreams,
+    UpstreamUnavailable,
+    PASSTHROUGH_HEADERS,
+)
+from app.services.extraction_pool import (
+    extraction_pool,
+    ExtractionQueueFull,
+    ExtractionTimeout,
+)
+from pydantic import BaseModel, Field
 
 router = APIRouter(
     prefix="/videos",
@@ -29,102 +57,503 @@ class VideoWithLinksResponse(VideoResponse):
     mp3_url: str | None = None
 
 
-@router.get("/playlist/{playlist_id}", response_model=list[VideoResponse])
-async def get_videos_by_playlist(playlist_id: int, db=Depends(get_db)):
+class PlayBatchRequest(BaseModel):
+    """Either explicit video ids, or a window of a playlist's videos (ordered by id)"""
+    video_ids: list[int] | None = Field(None, max_length=settings.PLAY_BATCH_MAX)
+    playlist_id: int | None = None
+    offset: int = Field(0, ge=0)
+    window: int = Field(10, ge=1, le=settings.PLAY_BATCH_MAX)
+
+
+def _client_address(request: Request):
+    return request.client.host if request.client else "unknown"
+
+
+async def _admit(client: str, youtube_video_id: str):
     """
-    Get all videos in a playlist (without download links)
+    Rate limiting and load shedding for a request that would run yt-dlp;
+    URL cache hits and requests joining an extraction that is already
+    running (single-flight) cost nothing, so they're let through uncounted
     """
-    query = await db.execute(
-        select(Video).where(Video.playlist_id == playlist_id)
-    )
-    videos = query.scalars().all()
-    return videos
+    if not settings.RATE_LIMIT_ENABLED:
+        return
 
+    ttl = url_cache.ttl(youtube_video_id)
+    if ttl is not None and ttl > 0:
+        return
 
-@router.get("/{video_id}", response_model=VideoResponse)
-async def get_video(video_id: int, db=Depends(get_db)):
+    if is_resolving(youtube_video_id):
+        return
+
+    # Nothing reaches yt-dlp while the circuit is open (stale URL or fail fast)
+    if extractor_circuit.is_open:
+        return
+
+    try:
+        await admission.check(client)
+    except RateLimited as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many playback requests, slow down",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Playback is busy, try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def _resolve_links(youtube_video_id: str, resolver=resolve_video_links, record_play: bool = True,
+                         client: str = None):
     """
-    Get video metadata (without download links)
+    Resolve playback URLs, mapping extraction pool pressure to HTTP errors.
+    With `client`, requests that miss the URL cache go through admission
+    control; only admitted requests count as plays.
     """
-    query = await db.execute(
-        select(Video).where(Video.id == video_id)
-    )
-    video = query.scalar_one_or_none()
-    
+    if client is not None:
+        await _admit(client, youtube_video_id)
+
+    if record_play:
+        prefetcher.record_play(youtube_video_id)
+
+    try:
+        return await resolver(youtube_video_id)
+    except ExtractionQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many playback requests, try again shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ExtractionTimeout:
+        raise HTTPException(
+            status_code=504,
+            detail="Timed out generating playback URLs"
+        )
+    except CircuitOpen as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Playback URLs are temporarily unavailable",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except VideoUnavailable:
+        raise HTTPException(
+            status_code=404,
+            detail="Video is unavailable on YouTube"
+        )
+
+
+async def _get_video(column, value):
+    """
+    Video metadata as a dict: from the catalog snapshot, or one Core query
+    while it's cold (the connection is released before we return)
+    """
+    catalog = catalog_store.current
+    if catalog:
+        if column is Video.id:
+            video = catalog.video(value)
+        else:
+            video = catalog.video_by_youtube_id(value)
+    else:
+        rows = await fetch_rows(
+            select_fields(Video, None, VIDEO_FIELDS).where(column == value)
+        )
+        video = rows[0] if rows else None
+
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
-    
+
     return video
 
 
-@router.get("/{video_id}/play", response_model=VideoWithLinksResponse)
-async def get_video_play_links(video_id: int, db=Depends(get_db)):
+def _cached_audio(youtube_video_id: str, touch: bool = True):
     """
-    Get video with fresh playback URLs (mp4 and mp3)
-    Generate URLs on-demand to avoid expiration issues
+    The on-disk copy of a lecture's audio, if the audio cache is on and has it.
+    Without `touch` the lookup isn't counted as a hit or a use for LRU.
     """
-    query = await db.execute(
-        select(Video).where(Video.id == video_id)
-    )
-    video = query.scalar_one_or_none()
-    
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
-    
-    # Generate fresh download URLs
-    mp4_url, mp3_url = get_video_links(video.video_id)
-    
+    if not settings.AUDIO_CACHE_ENABLED:
+        return None
+    if not touch:
+        return audio_cache.peek(youtube_video_id)
+    return audio_cache.get(youtube_video_id)
+
+
+def _disk_links(request: Request, video: dict, record_play: bool = True):
+    """
+    (mp4_url, mp3_url) for a lecture in the on-disk audio cache, or None:
+    its local file as mp3_url, mp4_url only from the URL cache (else None).
+    Only a play (`record_play`) counts as an audio cache hit.
+    """
+    if not _cached_audio(video["video_id"], touch=record_play):
+        return None
+    if record_play:
+        prefetcher.record_play(video["video_id"])
+    links = url_cache.get(video["video_id"])
+    return links[0] if links else None, str(request.url_for("get_cached_audio_file", video_id=video["id"]))
+
+
+def _require_links(mp4_url: str, mp3_url: str):
     if not mp4_url or not mp3_url:
         raise HTTPException(
-            status_code=500, 
+            status_code=500,
             detail="Failed to generate playback URLs"
         )
+    return mp4_url, mp3_url
+
+
+async def _play_links(request: Request, video: dict, resolver=resolve_video_links, record_play: bool = True):
+    """
+    (mp4_url, mp3_url) for the play routes. A lecture in the on-disk audio
+    cache gets its local file as mp3_url right away, without admission or
+    yt-dlp; its mp4_url is filled only from the URL cache (else None).
+    """
+    links = _disk_links(request, video, record_play)
+    if links:
+        return links
+
+    return _require_links(
+        *await _resolve_links(video["video_id"], resolver, record_play, _client_address(request))
+    )
+
+
+async def _batch_videos(body: PlayBatchRequest):
+    """
+    Video rows of a batch request, in request order, with one lookup:
+    the catalog snapshot, or a single query while it's cold.
+    Returns (videos, ids that don't exist).
+    """
+    catalog = catalog_store.current
+
+    if body.video_ids is not None:
+        ids = list(dict.fromkeys(body.video_ids))
+        if catalog:
+            found = {i: catalog.video(i) for i in ids}
+        else:
+            rows = await fetch_rows(select_fields(Video, None, VIDEO_FIELDS).where(Video.id.in_(ids)))
+            found = {row["id"]: row for row in rows}
+        return [found[i] for i in ids if found.get(i)], [i for i in ids if not found.get(i)]
+
+    if catalog:
+        return catalog.playlist_window(body.playlist_id, body.offset, body.window), []
+
+    rows = await fetch_rows(
+        select_fields(Video, None, VIDEO_FIELDS)
+        .where(Video.playlist_id == body.playlist_id)
+        .order_by(Video.id)
+        .offset(body.offset)
+        .limit(body.window)
+    )
+    return rows, []
+
+
+def _batch_error(video: dict, error: HTTPException):
+    return {"id": video["id"], "video_id": video["video_id"], "status": error.status_code, "error": error.detail}
+
+
+def _ndjson(item: dict) -> bytes:
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def _stream_batch(request: Request, videos: list[dict], missing: list[int]):
+    """
+    NDJSON lines: unknown ids and cache hits right away, then the misses
+    as their extractions finish. At most PLAY_BATCH_CONCURRENCY of a
+    batch's misses use the extraction pool at once, so one queued series
+    can't crowd out listeners pressing play.
+    """
+    for video_id in missing:
+        yield _ndjson({"id": video_id, "status": 404, "error": "Video not found"})
+
+    # Queued tracks aren't plays yet: they neither count towards the
+    # popularity ranking nor as audio cache hits
+    misses = []
+    for video in videos:
+        links = _disk_links(request, video, record_play=False)
+        if links:
+            yield _ndjson({**video, "status": 200, "mp4_url": links[0], "mp3_url": links[1]})
+            continue
+
+        links = url_cache.get(video["video_id"])
+        if not links:
+            misses.append(video)
+            continue
+        try:
+            # Same status rules as /play: an audio-only entry is a 500 there too
+            mp4_url, mp3_url = _require_links(*links)
+        except HTTPException as e:
+            yield _ndjson(_batch_error(video, e))
+            continue
+        yield _ndjson({**video, "status": 200, "mp4_url": mp4_url, "mp3_url": mp3_url})
+
+    semaphore = asyncio.Semaphore(settings.PLAY_BATCH_CONCURRENCY)
+
+    async def resolve(video):
+        async with semaphore:
+            try:
+                # Same resolver as /play, so stale URLs still serve while the circuit is open
+                mp4_url, mp3_url = await _play_links(request, video, resolve_video_links, record_play=False)
+            except HTTPException as e:
+                return _batch_error(video, e)
+            return {**video, "status": 200, "mp4_url": mp4_url, "mp3_url": mp3_url}
+
+    tasks = [asyncio.ensure_future(resolve(v)) for v in misses]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield _ndjson(await next_done)
+    finally:
+        # Client went away: stop waiting (shared extractions carry on)
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/play:batch")
+async def get_play_links_batch(body: PlayBatchRequest, request: Request):
+    """
+    Playback URLs for several videos at once, e.g. the next tracks of an
+    autoplay queue: either `video_ids`, or `playlist_id` with `offset` /
+    `window`. Streams one JSON object per line (NDJSON) as each video is
+    ready: cached URLs first, then misses, resolved concurrently. Every
+    line carries a `status` (200, or the error a /play call would give).
+    """
+    if (body.video_ids is None) == (body.playlist_id is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Pass either video_ids or playlist_id"
+        )
+
+    videos, missing = await _batch_videos(body)
+
+    return StreamingResponse(
+        _stream_batch(request, videos, missing),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@router.get("/playlist/{playlist_id}")
+async def get_videos_by_playlist(
+    playlist_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    after: int | None = None,
+    fields: str | None = None,
+):
+    """
+    Get the videos of a playlist (without download links), ordered by id.
+    Keyset-paginated on the (playlist_id, id) index: pass the X-Next-Cursor
+    response header back as `after`. `fields` selects a subset of columns.
+    Served from the in-memory catalog as pre-encoded JSON with an ETag
+    (304 on If-None-Match); the DB is only hit while the catalog is cold.
+    """
+    names = parse_fields(fields, VIDEO_FIELDS)
+
+    catalog = catalog_store.current
+    if catalog:
+        return catalog_response(
+            request,
+            catalog,
+            ("videos", playlist_id, limit, after, tuple(names or ())),
+            lambda: catalog.page_videos(playlist_id, limit, after, names),
+        )
+
+    query = select_fields(Video, names, VIDEO_FIELDS).where(Video.playlist_id == playlist_id)
+    return await fetch_page(query, Video.id, limit, after, response)
+
+
+@router.get("/cache/stats")
+async def get_url_cache_stats():
+    """
+    URL cache hit / miss / eviction counters, extraction pool load
+    and background refresh activity
+    """
+    return {
+        "url_cache": url_cache.stats(),
+        "extraction_pool": extraction_pool.stats(),
+        "prefetch": prefetcher.stats(),
+        "catalog": catalog_store.current.stats() if catalog_store.current else None,
+        "stream_relay": stream_relay.stats() if settings.STREAM_RELAY_ENABLED else None,
+        "audio_cache": audio_cache.stats() if settings.AUDIO_CACHE_ENABLED else None,
+        "admission": admission.stats() if settings.RATE_LIMIT_ENABLED else None,
+        "extractor_circuit": extractor_circuit.stats(),
+    }
+
+
+@router.get("/{video_id}", response_model=VideoResponse)
+async def get_video(video_id: int):
+    """
+    Get video metadata (without download links)
+    """
+    return await _get_video(Video.id, video_id)
+
+
+@router.get("/{video_id}/play", response_model=VideoWithLinksResponse)
+async def get_video_play_links(video_id: int, request: Request):
+    """
+    Get video with playback URLs (mp4 and mp3)
+    URLs are cached until shortly before their googlevideo expiry
+    """
+    video = await _get_video(Video.id, video_id)
+    
+    # Reuse cached URLs until they are about to expire
+    mp4_url, mp3_url = await _play_links(request, video)
     
     # Return video data with fresh URLs
     return VideoWithLinksResponse(
-        id=video.id,
-        video_id=video.video_id,
-        playlist_id=video.playlist_id,
-        title=video.title,
-        thumbnail=video.thumbnail,
-        duration=video.duration,
+        **video,
         mp4_url=mp4_url,
         mp3_url=mp3_url
     )
 
 
+@router.get("/{video_id}/audio")
+async def get_video_audio(video_id: int, request: Request, redirect: bool = False):
+    """
+    Audio-only playback URL for the player's Audio button.
+    With ?redirect=true answers 302 straight to the stream, so an <audio>
+    element can use this route as its src without a JSON round-trip.
+    Lectures in the on-disk audio cache point at their local file instead.
+    """
+    youtube_video_id = (await _get_video(Video.id, video_id))["video_id"]
+
+    if _cached_audio(youtube_video_id):
+        prefetcher.record_play(youtube_video_id)
+        mp3_url = str(request.url_for("get_cached_audio_file", video_id=video_id))
+    else:
+        mp3_url = await _resolve_links(youtube_video_id, resolve_audio_url, client=_client_address(request))
+
+    if not mp3_url:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to generate audio URL"
+        )
+
+    if redirect:
+        # Never let the browser cache the redirect past the URL's expiry
+        return RedirectResponse(
+            mp3_url,
+            status_code=302,
+            headers={"Cache-Control": "no-store"}
+        )
+
+    return {
+        "id": video_id,
+        "video_id": youtube_video_id,
+        "mp3_url": mp3_url
+    }
+
+
+@router.get("/{video_id}/audio/file")
+async def get_cached_audio_file(video_id: int):
+    """
+    A lecture's audio from the on-disk cache (AUDIO_CACHE_ENABLED), sent
+    with sendfile and Range support; 404 when it isn't cached
+    """
+    youtube_video_id = (await _get_video(Video.id, video_id))["video_id"]
+
+    cached = _cached_audio(youtube_video_id)
+    if not cached:
+        raise HTTPException(status_code=404, detail="Audio is not cached")
+
+    return FileResponse(
+        cached.path,
+        media_type=cached.media_type,
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
+
+
+class _RelayResponse(StreamingResponse):
+    """
+    Streams a RelayedStream and closes it however the response ends: the
+    body generator's own cleanup never runs if it's never started
+    """
+
+    def __init__(self, stream, **kwargs):
+        super().__init__(stream.body(), **kwargs)
+        self.stream = stream
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.stream.close()
+
+
+@router.get("/{video_id}/stream")
+async def stream_video_audio(video_id: int, request: Request):
+    """
+    Audio relayed through this server, for listeners that can't fetch the
+    IP-bound googlevideo URL themselves (enable with STREAM_RELAY_ENABLED).
+    Range requests pass through for seeking. Open streams are limited per
+    client address; behind a proxy / tunnel run uvicorn with
+    --proxy-headers so that's the listener's address, not the proxy's.
+    """
+    if not settings.STREAM_RELAY_ENABLED:
+        raise HTTPException(status_code=404, detail="Stream relay is disabled")
+
+    youtube_video_id = (await _get_video(Video.id, video_id))["video_id"]
+
+    client = _client_address(request)
+    mp3_url = await _resolve_links(youtube_video_id, resolve_audio_url, client=client)
+    if not mp3_url:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to generate audio URL"
+        )
+
+    try:
+        stream_relay.slots.acquire(client)
+    except TooManyStreams as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many open streams",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    try:
+        upstream = await stream_relay.open(youtube_video_id, request.headers.get("range"), mp3_url)
+    except (UpstreamUnavailable, httpx.HTTPError, ExtractionQueueFull, ExtractionTimeout, CircuitOpen,
+            VideoUnavailable):
+        stream_relay.slots.release(client)
+        raise HTTPException(
+            status_code=502,
+            detail="Could not open the audio stream"
+        )
+    except BaseException:
+        stream_relay.slots.release(client)
+        raise
+
+    headers = {name: upstream.headers[name] for name in PASSTHROUGH_HEADERS if name in upstream.headers}
+    headers["Cache-Control"] = "no-store"
+
+    return _RelayResponse(
+        stream_relay.relay(youtube_video_id, upstream, client),
+        status_code=upstream.status_code,
+        headers=headers,
+    )
+
+
 @router.get("/youtube/{youtube_video_id}/play")
 async def get_video_play_links_by_youtube_id(
     youtube_video_id: str, 
-    db=Depends(get_db)
+    request: Request,
 ):
     """
     Get video playback URLs using YouTube video ID (e.g., 'dQw4w9WgXcQ')
     Useful if you have the YouTube ID but not the database ID
     """
-    query = await db.execute(
-        select(Video).where(Video.video_id == youtube_video_id)
-    )
-    video = query.scalar_one_or_none()
-    
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
+    video = await _get_video(Video.video_id, youtube_video_id)
     
-    # Generate fresh download URLs
-    mp4_url, mp3_url = get_video_links(video.video_id)
-    
-    if not mp4_url or not mp3_url:
-        raise HTTPException(
-            status_code=500, 
-            detail="Failed to generate playback URLs"
-        )
+    # Reuse cached URLs until they are about to expire
+    mp4_url, mp3_url = await _play_links(request, video)
     
     return {
-        "id": video.id,
-        "video_id": video.video_id,
-        "title": video.title,
-        "thumbnail": video.thumbnail,
-        "duration": video.duration,
+        "id": video["id"],
+        "video_id": video["video_id"],
+        "title": video["title"],
+        "thumbnail": video["thumbnail"],
+        "duration": video["duration"],
         "mp4_url": mp4_url,
         "mp3_url": mp3_url
     }
\ No newline at end of file
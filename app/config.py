@@ -1,17 +1,113 @@
 import os
 from dotenv import load_dotenv
-import psycopg2
 load_dotenv()
 
 class Settings:
     YT_API_KEY: str = os.getenv("YT_API_KEY")
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    # Worker processes; uvicorn and gunicorn read the same variable as their default --workers
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+    # Database pool and sessions (see app/db/session.py)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "30"))  # extra connections when the pool is busy
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # reconnect connections older than this
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_COMMAND_TIMEOUT: float = float(os.getenv("DB_COMMAND_TIMEOUT", "60"))  # per statement
+    DB_CONNECT_TIMEOUT: float = float(os.getenv("DB_CONNECT_TIMEOUT", "60"))
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"  # log SQL
+    DB_EXPIRE_ON_COMMIT: bool = os.getenv("DB_EXPIRE_ON_COMMIT", "false").lower() == "true"
+    DB_AUTOFLUSH: bool = os.getenv("DB_AUTOFLUSH", "false").lower() == "true"
+    # Also run the schema migration (python -m app.db.migrate) on startup; off so workers don't issue DDL on every boot
+    DB_CREATE_TABLES: bool = os.getenv("DB_CREATE_TABLES", "false").lower() == "true"
+
+    # Resolved playback URL cache (see app/services/url_cache.py)
+    URL_CACHE_BACKEND: str = os.getenv("URL_CACHE_BACKEND", "memory")  # "memory" or "sqlite" (shared by workers)
+    URL_CACHE_SQLITE_PATH: str = os.getenv("URL_CACHE_SQLITE_PATH", "url_cache.sqlite3")
+    URL_CACHE_MAX_ENTRIES: int = int(os.getenv("URL_CACHE_MAX_ENTRIES", "5000"))
+    URL_CACHE_SAFETY_MARGIN: int = int(os.getenv("URL_CACHE_SAFETY_MARGIN", "600"))  # seconds before expire=
+    URL_CACHE_DEFAULT_TTL: int = int(os.getenv("URL_CACHE_DEFAULT_TTL", "1800"))  # when URL has no expire=
+    URL_CACHE_UNAVAILABLE_TTL: int = int(os.getenv("URL_CACHE_UNAVAILABLE_TTL", "300"))  # private / removed videos
+
+    # yt-dlp worker pool (see app/services/extraction_pool.py)
+    EXTRACTION_MAX_WORKERS: int = int(os.getenv("EXTRACTION_MAX_WORKERS", "8"))
+    EXTRACTION_MAX_QUEUE: int = int(os.getenv("EXTRACTION_MAX_QUEUE", "32"))
+    EXTRACTION_TIMEOUT: float = float(os.getenv("EXTRACTION_TIMEOUT", "20"))  # seconds per call
+    EXTRACTION_RETRY_AFTER: int = int(os.getenv("EXTRACTION_RETRY_AFTER", "5"))  # Retry-After on 503
+
+    # Background URL refresh for hot / new videos (see app/services/prefetch.py)
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"  # with several workers, needs URL_CACHE_BACKEND=sqlite
+    PREFETCH_INTERVAL: int = int(os.getenv("PREFETCH_INTERVAL", "60"))  # seconds between runs
+    PREFETCH_TOP_N: int = int(os.getenv("PREFETCH_TOP_N", "50"))
+    PREFETCH_REFRESH_WINDOW: int = int(os.getenv("PREFETCH_REFRESH_WINDOW", "900"))  # refresh when TTL below
+    PREFETCH_MAX_PER_RUN: int = int(os.getenv("PREFETCH_MAX_PER_RUN", "5"))  # rate limit
+    PREFETCH_WARM_QUEUE: int = int(os.getenv("PREFETCH_WARM_QUEUE", "100"))  # most recently published synced videos kept
+    PREFETCH_DECAY: float = float(os.getenv("PREFETCH_DECAY", "0.95"))  # play count decay per PREFETCH_INTERVAL
+
+    # YouTube Data API client used by the sync (see app/services/youtube_api.py)
+    YOUTUBE_API_BASE_URL: str = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+    YOUTUBE_API_MAX_CONNECTIONS: int = int(os.getenv("YOUTUBE_API_MAX_CONNECTIONS", "10"))
+    YOUTUBE_API_MAX_RETRIES: int = int(os.getenv("YOUTUBE_API_MAX_RETRIES", "4"))
+    YOUTUBE_API_TIMEOUT: float = float(os.getenv("YOUTUBE_API_TIMEOUT", "15"))
+    YOUTUBE_API_RPS: float = float(os.getenv("YOUTUBE_API_RPS", "10"))  # requests per second
+    YOUTUBE_API_BURST: int = int(os.getenv("YOUTUBE_API_BURST", "20"))
+    YOUTUBE_API_DAILY_QUOTA: int = int(os.getenv("YOUTUBE_API_DAILY_QUOTA", "10000"))  # units per day
+    SYNC_CONCURRENCY: int = int(os.getenv("SYNC_CONCURRENCY", "10"))  # playlists synced in parallel
+    CATALOG_REFRESH_INTERVAL: int = int(os.getenv("CATALOG_REFRESH_INTERVAL", "60"))  # seconds between change checks
+    CATALOG_CACHE_MAX_AGE: int = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))  # Cache-Control max-age of catalog pages
+    ENCODED_CACHE_MAX_ENTRIES: int = int(os.getenv("ENCODED_CACHE_MAX_ENTRIES", "2048"))  # encoded catalog pages kept
+    # Sync state older than this is ignored: a full pass re-fetches every video's title / thumbnail
+    SYNC_FULL_REFRESH_AGE: int = int(os.getenv("SYNC_FULL_REFRESH_AGE", str(7 * 24 * 3600)))
+    SYNC_MIN_INTERVAL: int = int(os.getenv("SYNC_MIN_INTERVAL", "3600"))  # scheduled runs skip if one finished this recently
+    SYNC_WARM_NEW_VIDEOS: bool = os.getenv("SYNC_WARM_NEW_VIDEOS", "true").lower() == "true"  # queue new ids for URL warming
+
+    # Optional audio relay at /videos/{id}/stream (see app/services/stream_relay.py)
+    STREAM_RELAY_ENABLED: bool = os.getenv("STREAM_RELAY_ENABLED", "false").lower() == "true"
+    STREAM_MAX_STREAMS: int = int(os.getenv("STREAM_MAX_STREAMS", "200"))  # open streams per worker
+    STREAM_PER_CLIENT_LIMIT: int = int(os.getenv("STREAM_PER_CLIENT_LIMIT", "3"))  # open streams per client address
+    STREAM_TIMEOUT: float = float(os.getenv("STREAM_TIMEOUT", "30"))  # upstream read timeout
+    STREAM_MAX_RERESOLVES: int = int(os.getenv("STREAM_MAX_RERESOLVES", "2"))  # fresh URLs tried per open
+    STREAM_RETRY_AFTER: int = int(os.getenv("STREAM_RETRY_AFTER", "10"))  # Retry-After on 429
+
+    # Optional on-disk copies of the most played audio (see app/services/audio_cache.py)
+    AUDIO_CACHE_ENABLED: bool = os.getenv("AUDIO_CACHE_ENABLED", "false").lower() == "true"
+    AUDIO_CACHE_DIR: str = os.getenv("AUDIO_CACHE_DIR", "audio_cache")
+    AUDIO_CACHE_MAX_BYTES: int = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+    AUDIO_CACHE_MAX_FILE_BYTES: int = int(os.getenv("AUDIO_CACHE_MAX_FILE_BYTES", str(300 * 1024 ** 2)))
+    AUDIO_CACHE_TOP_N: int = int(os.getenv("AUDIO_CACHE_TOP_N", "50"))  # most played videos considered
+    AUDIO_CACHE_MIN_PLAYS: float = float(os.getenv("AUDIO_CACHE_MIN_PLAYS", "3"))  # decayed play count to qualify
+    AUDIO_CACHE_MAX_PER_RUN: int = int(os.getenv("AUDIO_CACHE_MAX_PER_RUN", "2"))  # downloads per run
+    AUDIO_CACHE_INTERVAL: int = int(os.getenv("AUDIO_CACHE_INTERVAL", "300"))  # seconds between runs
+    AUDIO_CACHE_EVICTION: str = os.getenv("AUDIO_CACHE_EVICTION", "lfu")  # "lfu" or "lru"
+    AUDIO_CACHE_TIMEOUT: float = float(os.getenv("AUDIO_CACHE_TIMEOUT", "60"))  # download read timeout
+
+    # POST /videos/play:batch
+    PLAY_BATCH_MAX: int = int(os.getenv("PLAY_BATCH_MAX", "50"))  # videos per request
+    PLAY_BATCH_CONCURRENCY: int = int(os.getenv("PLAY_BATCH_CONCURRENCY", "4"))  # extractions per request at once
+
+    # Admission control for routes that run yt-dlp (see app/services/admission.py)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "sqlite" (shared by workers)
+    RATE_LIMIT_SQLITE_PATH: str = os.getenv("RATE_LIMIT_SQLITE_PATH", "rate_limit.sqlite3")
+    RATE_LIMIT_CLIENT_RATE: float = float(os.getenv("RATE_LIMIT_CLIENT_RATE", "0.2"))  # extractions/s per client
+    RATE_LIMIT_CLIENT_BURST: int = int(os.getenv("RATE_LIMIT_CLIENT_BURST", "10"))
+    RATE_LIMIT_GLOBAL_RATE: float = float(os.getenv("RATE_LIMIT_GLOBAL_RATE", "4"))  # extractions/s for everyone
+    RATE_LIMIT_GLOBAL_BURST: int = int(os.getenv("RATE_LIMIT_GLOBAL_BURST", "40"))
+    SHED_QUEUE_DEPTH: int = int(os.getenv("SHED_QUEUE_DEPTH", "24"))  # queued extractions before shedding
+    SHED_LATENCY: float = float(os.getenv("SHED_LATENCY", "10"))  # avg extraction seconds before shedding
+
+    # Circuit breaker around yt-dlp extraction (see app/services/circuit_breaker.py)
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # consecutive failures
+    CIRCUIT_ERROR_RATE: float = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))  # failure ratio within the window
+    CIRCUIT_MIN_CALLS: int = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))  # calls in the window before the ratio counts
+    CIRCUIT_WINDOW: float = float(os.getenv("CIRCUIT_WINDOW", "60"))  # seconds
+    CIRCUIT_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))  # before half-open probes
+    CIRCUIT_HALF_OPEN_PROBES: int = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+    CIRCUIT_STALE_MIN_TTL: int = int(os.getenv("CIRCUIT_STALE_MIN_TTL", "60"))  # stale URLs need this much life left
 
 settings = Settings()
 
 # Remove sslmode from DATABASE_URL for asyncpg compatibility
 if settings.DATABASE_URL and '?' in settings.DATABASE_URL:
     settings.DATABASE_URL = settings.DATABASE_URL.split('?')[0]
-
-print(f"DEBUG: DATABASE_URL = {settings.DATABASE_URL}")
-print(f"DEBUG: YT_API_KEY = {settings.YT_API_KEY[:20] if settings.YT_API_KEY else 'NOT SET'}...")
@@ -0,0 +1,37 @@
+"""
+Idempotent schema migration: brings an existing database up to the models.
+
+    python -m app.db.migrate
+
+Creates missing tables (CREATE TABLE IF NOT EXISTS), then every index the
+models declare (CREATE INDEX IF NOT EXISTS): create_all alone never adds
+a new index to a table that already exists. Safe to run on every deploy.
+"""
+import asyncio
+from sqlalchemy.schema import CreateIndex
+from app.db.models import Base
+from app.db.session import engine
+
+
+def _migrate(conn):
+    Base.metadata.create_all(conn, checkfirst=True)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+async def migrate():
+    async with engine.begin() as conn:
+        await conn.run_sync(_migrate)
+
+
+async def main():
+    try:
+        await migrate()
+    finally:
+        await engine.dispose()
+    print("✅ Database schema is up to date")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, JSON, DateTime, Index
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -27,3 +27,43 @@ class Video(Base):
     thumbnail = Column(String)
 
     playlist = relationship("Playlist", back_populates="videos")
+
+    __table_args__ = (
+        # Keyset pagination of a playlist's videos: WHERE playlist_id = ? AND id > ? ORDER BY id
+        Index("ix_videos_playlist_id_id", "playlist_id", "id"),
+    )
+
+
+class PlaylistSyncState(Base):
+    """Per-playlist state remembered between syncs for incremental crawling"""
+    __tablename__ = "playlist_sync_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    playlist_id = Column(String, unique=True)  # YouTube playlist id
+    etag = Column(String, nullable=True)  # playlists.list item ETag
+    item_count = Column(Integer, nullable=True)  # contentDetails.itemCount
+    pages = Column(JSON, nullable=True)  # [{"etag": ..., "next": ...}] per playlistItems page
+    synced_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class CatalogVersion(Base):
+    """Single-row counter bumped by every transaction that changes playlists or videos"""
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+
+
+class SyncRun(Base):
+    """One execution (or skipped attempt) of the YouTube sync, shared by all workers"""
+    __tablename__ = "sync_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True)
+    trigger = Column(String)  # "scheduler" | "api"
+    status = Column(String)  # queued | running | completed | failed | skipped
+    host = Column(String, nullable=True)  # hostname:pid that ran it
+    stats = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)  # failure message, or why the run was skipped
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,6 +1,9 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings  # loads DATABASE_URL
+from app.metrics import registry, db_pool_wait
 import ssl
+import time
 
 DATABASE_URL = settings.DATABASE_URL
 
@@ -9,32 +12,63 @@ ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - start)
+
+
 # Create the async engine with larger pool for concurrency
 engine = create_async_engine(
     DATABASE_URL,
-    echo=False,  # Set to False in production to reduce noise
+    poolclass=TimedQueuePool,
+    echo=settings.DB_ECHO,
     connect_args={
         "ssl": ssl_context,
         "server_settings": {"jit": "off"},
-        "command_timeout": 60,  # Increased from 10 to 60 seconds
-        "timeout": 60,  # Increased from 10 to 60 seconds
+        "command_timeout": settings.DB_COMMAND_TIMEOUT,
+        "timeout": settings.DB_CONNECT_TIMEOUT,
     },
-    pool_size=20,  # Increased from default 5 to 20
-    max_overflow=30,  # Allow up to 30 additional connections when pool is full
-    pool_pre_ping=True,  # Verify connections are alive before using
-    pool_recycle=3600,  # Recycle connections after 1 hour
-    pool_timeout=30,  # Wait up to 30 seconds for available connection
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
 )
 
+# Pool occupancy, read at scrape time
+registry.gauge("db_pool_size", "Configured pool size", callback=lambda: engine.sync_engine.pool.size())
+registry.gauge("db_pool_checked_out", "Connections currently in use", callback=lambda: engine.sync_engine.pool.checkedout())
+registry.gauge("db_pool_idle", "Idle connections in the pool", callback=lambda: engine.sync_engine.pool.checkedin())
+registry.gauge("db_pool_overflow", "Connections open beyond pool_size", callback=lambda: max(0, engine.sync_engine.pool.overflow()))
+
 # Create async session factory using async_sessionmaker
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
-    expire_on_commit=False,
+    expire_on_commit=settings.DB_EXPIRE_ON_COMMIT,
     class_=AsyncSession,
-    autoflush=False,  # Better control over when to flush
+    autoflush=settings.DB_AUTOFLUSH,
 )
 
 # Dependency for FastAPI routes
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def fetch_rows(query) -> list[dict]:
+    """
+    Run a read-only Core query and hand the connection straight back to
+    the pool. Request handlers use this instead of a get_db session, so a
+    connection is held for the query only, never across yt-dlp or other
+    slow work that follows.
+    """
+    async with engine.connect() as conn:
+        result = await conn.execute(query)
+        return [dict(row) for row in result.mappings()]
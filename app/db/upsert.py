@@ -0,0 +1,126 @@
+from sqlalchemy import or_, select, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.db.models import Playlist, Video, PlaylistSyncState, CatalogVersion
+
+# Rows per INSERT statement; asyncpg allows 32767 bind parameters
+CHUNK_SIZE = 1000
+
+# True for rows created by the statement, False for rows it updated
+INSERTED = literal_column("(xmax = 0)").label("inserted")
+
+
+async def upsert_playlists(db, rows: list[dict]) -> dict[str, int]:
+    """
+    INSERT ... ON CONFLICT (playlist_id) DO UPDATE for all playlists at once.
+    Rows whose metadata didn't change aren't touched; if any row changed,
+    the catalog version is bumped. Returns {youtube playlist id: db id}.
+    Doesn't commit.
+    """
+    ids = {}
+    changed = False
+    rows = _dedupe(rows, "playlist_id")
+
+    for chunk in _chunks(rows):
+        stmt = pg_insert(Playlist).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Playlist.playlist_id],
+            set_={
+                "name": stmt.excluded.name,
+                "description": stmt.excluded.description,
+                "thumbnail": stmt.excluded.thumbnail,
+            },
+            where=or_(
+                Playlist.name.is_distinct_from(stmt.excluded.name),
+                Playlist.description.is_distinct_from(stmt.excluded.description),
+                Playlist.thumbnail.is_distinct_from(stmt.excluded.thumbnail),
+            ),
+        ).returning(Playlist.id, Playlist.playlist_id)
+
+        result = await db.execute(stmt)
+        written = {row.playlist_id: row.id for row in result}
+        changed = changed or bool(written)
+        ids.update(written)
+
+        # Untouched rows aren't returned: look their ids up
+        unchanged = [r["playlist_id"] for r in chunk if r["playlist_id"] not in written]
+        if unchanged:
+            result = await db.execute(
+                select(Playlist.id, Playlist.playlist_id).where(Playlist.playlist_id.in_(unchanged))
+            )
+            ids.update({row.playlist_id: row.id for row in result})
+
+    if changed:
+        await bump_catalog_version(db)
+    return ids
+
+
+async def upsert_videos(db, rows: list[dict]) -> tuple[list[str], list[str]]:
+    """
+    INSERT ... ON CONFLICT (video_id) DO UPDATE for a batch of videos.
+    Rows whose metadata didn't change aren't touched; if any row changed,
+    the catalog version is bumped. A video keeps the playlist it was first
+    synced into. Returns (inserted ids, updated ids). Doesn't commit.
+    """
+    inserted, updated = [], []
+    # Stable order keeps concurrent playlist upserts from deadlocking
+    rows = sorted(_dedupe(rows, "video_id"), key=lambda r: r["video_id"])
+
+    for chunk in _chunks(rows):
+        stmt = pg_insert(Video).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Video.video_id],
+            set_={
+                "title": stmt.excluded.title,
+                "thumbnail": stmt.excluded.thumbnail,
+                "duration": stmt.excluded.duration,
+            },
+            where=or_(
+                Video.title.is_distinct_from(stmt.excluded.title),
+                Video.thumbnail.is_distinct_from(stmt.excluded.thumbnail),
+                Video.duration.is_distinct_from(stmt.excluded.duration),
+            ),
+        ).returning(Video.id, Video.video_id, INSERTED)
+
+        result = await db.execute(stmt)
+        for row in result:
+            (inserted if row.inserted else updated).append(row.video_id)
+
+    if inserted or updated:
+        await bump_catalog_version(db)
+    return inserted, updated
+
+
+async def bump_catalog_version(db):
+    """
+    Record a catalog change; workers reload their snapshot when the
+    version moves. Part of the caller's transaction, so other workers
+    see the new version together with the rows. Doesn't commit.
+    """
+    stmt = pg_insert(CatalogVersion).values(id=1, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CatalogVersion.id],
+        set_={"version": CatalogVersion.version + 1},
+    )
+    await db.execute(stmt)
+
+
+async def upsert_sync_state(db, row: dict):
+    """
+    Save one playlist's incremental sync state. Doesn't commit.
+    """
+    stmt = pg_insert(PlaylistSyncState).values(row)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlaylistSyncState.playlist_id],
+        set_={k: stmt.excluded[k] for k in row if k != "playlist_id"},
+    )
+    await db.execute(stmt)
+
+
+def _dedupe(rows: list[dict], key: str):
+    # ON CONFLICT DO UPDATE can't touch the same row twice in one statement
+    return list({row[key]: row for row in rows}.values())
+
+
+def _chunks(rows: list):
+    for i in range(0, len(rows), CHUNK_SIZE):
+        yield rows[i:i + CHUNK_SIZE]
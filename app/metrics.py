@@ -0,0 +1,275 @@
+# Tiny in-process Prometheus instrumentation: counters, gauges and
+# histograms rendered in the text exposition format at /metrics.
+# No external dependency; an update is a dict lookup under a lock, so it's
+# safe from extraction pool threads. Metrics are per worker process.
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets (seconds) shared by the request / extraction histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict):
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class _Sample(Metric):
+    """
+    Counter / gauge values: set or incremented explicitly, or computed at
+    scrape time by `callback`, which returns a number or a
+    {label values tuple: number} dict
+    """
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+        self.callback = callback
+
+    def render(self):
+        values = self._values
+        if self.callback is not None:
+            try:
+                result = self.callback()
+            except Exception:
+                result = None
+            if result is None:
+                values = {}
+            elif isinstance(result, dict):
+                values = result
+            else:
+                values = {(): result}
+
+        lines = self.header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Sample):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Sample):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = self.header()
+        for key, entry in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                le = _format_labels(self.label_names, key, [f'le="{_format_value(float(bound))}"'])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.label_names, key, ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{le} {entry[-1]}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{labels} {entry[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=(), callback=None):
+        return self.register(Counter(name, documentation, labels, callback))
+
+    def gauge(self, name, documentation, labels=(), callback=None):
+        return self.register(Gauge(name, documentation, labels, callback))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ============================
+# HTTP
+# ============================
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to first response byte per route",
+    labels=("method", "route", "status"),
+)
+
+# ============================
+# yt-dlp
+# ============================
+extraction_duration = registry.histogram(
+    "ytdlp_extraction_seconds",
+    "yt-dlp extract_info duration",
+    labels=("outcome",),
+)
+extraction_failures = registry.counter(
+    "ytdlp_extraction_failures_total",
+    "yt-dlp extractions that raised or returned no usable URL",
+    labels=("reason",),
+)
+
+# ============================
+# Database pool
+# ============================
+db_pool_wait = registry.histogram(
+    "db_pool_wait_seconds",
+    "Time spent getting a connection out of the pool",
+)
+
+# ============================
+# Event loop
+# ============================
+event_loop_lag = registry.gauge(
+    "event_loop_lag_seconds",
+    "Most recent event loop scheduling delay",
+)
+event_loop_lag_histogram = registry.histogram(
+    "event_loop_lag_distribution_seconds",
+    "Event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+# ============================
+# Sync
+# ============================
+sync_phase_duration = registry.histogram(
+    "sync_phase_seconds",
+    "Duration of each YouTube sync phase",
+    labels=("phase",),
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+youtube_api_calls = registry.counter(
+    "youtube_api_calls_total",
+    "YouTube Data API requests by resource and HTTP status",
+    labels=("resource", "status"),
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request up to its response
+    start, labelled with the route template (/videos/{video_id}/play),
+    not the raw path, so cardinality stays bounded
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                route = scope.get("route")
+                http_request_duration.observe(
+                    time.perf_counter() - start,
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=status["code"],
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """
+    Sleep `interval` repeatedly; any extra delay is time the loop spent
+    busy elsewhere (blocking calls, CPU-heavy handlers)
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - start - interval)
+        event_loop_lag.set(lag)
+        event_loop_lag_histogram.observe(lag)
@@ -1,6 +1,9 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from app.services.youtube_sync import sync_playlists_and_videos
-import asyncio
+from app.services.sync_runner import sync_runner
+from app.services.prefetch import prefetcher
+from app.services.audio_cache import audio_cache
+from app.services.catalog import catalog_store
+from app.config import settings
 
 # Global scheduler instance
 scheduler = None
@@ -11,7 +14,62 @@ def start_scheduler():
         return
     
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(sync_playlists_and_videos, "interval", hours=2, id="youtube_sync")
+    # Every worker schedules it; the advisory lock lets only one of them run it
+    scheduler.add_job(
+        sync_runner.run_scheduled,
+        "interval",
+        hours=2,
+        id="youtube_sync",
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Pick up catalog changes committed by a sync on another worker
+    scheduler.add_job(
+        catalog_store.refresh_if_changed,
+        "interval",
+        seconds=settings.CATALOG_REFRESH_INTERVAL,
+        id="catalog_refresh",
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Age play counts (prefetch and audio cache ranking) on every worker
+    scheduler.add_job(
+        prefetcher.decay_plays,
+        "interval",
+        seconds=settings.PREFETCH_INTERVAL,
+        id="play_count_decay",
+        max_instances=1,
+        coalesce=True,
+    )
+
+    if settings.PREFETCH_ENABLED and not prefetcher.enabled:
+        print("⚠️ URL prefetch with several workers (WEB_CONCURRENCY) needs URL_CACHE_BACKEND=sqlite; not scheduled")
+
+    if prefetcher.enabled:
+        # Keep hot videos' playback URLs warm; never overlap runs. Every
+        # worker schedules it, only the prefetch leader does the work
+        scheduler.add_job(
+            prefetcher.run,
+            "interval",
+            seconds=settings.PREFETCH_INTERVAL,
+            id="url_prefetch",
+            max_instances=1,
+            coalesce=True,
+        )
+
+    if settings.AUDIO_CACHE_ENABLED:
+        # Download the most played lectures to disk, a few at a time. Every
+        # worker rescans the directory, only the audio cache leader downloads
+        scheduler.add_job(
+            audio_cache.run,
+            "interval",
+            seconds=settings.AUDIO_CACHE_INTERVAL,
+            id="audio_cache",
+            max_instances=1,
+            coalesce=True,
+        )
     
     try:
         scheduler.start()
@@ -0,0 +1,246 @@
+import asyncio
+import math
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from app.config import settings
+from app.metrics import registry
+from app.services.extraction_pool import extraction_pool
+
+# Key of the bucket shared by all clients
+GLOBAL_KEY = "*"
+
+
+class RateLimited(Exception):
+    """Raised when a client (or everyone together) is out of extraction tokens"""
+
+    def __init__(self, scope: str, retry_after: int):
+        super().__init__(f"Rate limited ({scope})")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class Overloaded(Exception):
+    """Raised while extraction is too slow or too backed up to take more work"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Shedding load ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class BucketStore(ABC):
+    """
+    Token buckets keyed by client: key -> (tokens, updated_at).
+    `take` refills at `rate` tokens/s up to `burst`, then takes one token;
+    it returns 0 when allowed, else the seconds until a token is available.
+    Stores that block on I/O set `blocking`, and AdmissionControl calls
+    them from a thread instead of the event loop.
+    """
+
+    blocking = False
+
+    def init(self):
+        """Create storage (files, tables); called once at startup"""
+
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: int) -> float:
+        ...
+
+    @abstractmethod
+    def give_back(self, key: str, burst: int):
+        ...
+
+    @staticmethod
+    def _refill(state, rate: float, burst: int, now: float):
+        if state is None:
+            return float(burst)
+        tokens, updated = state
+        return min(float(burst), tokens + (now - updated) * rate)
+
+
+class MemoryBucketStore(BucketStore):
+    """
+    Per-process buckets; with N workers each client effectively gets N
+    times the configured rate. Idle buckets are dropped LRU beyond `max_keys`.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens = self._refill(self._buckets.get(key), rate, burst, now)
+
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+        self._buckets[key] = (tokens - 1, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0
+
+    def give_back(self, key: str, burst: int):
+        state = self._buckets.get(key)
+        if state is not None:
+            self._buckets[key] = (min(float(burst), state[0] + 1), state[1])
+
+
+class SQLiteBucketStore(BucketStore):
+    """
+    Buckets in a local SQLite file (WAL mode) shared by every worker on the
+    host, so the limits hold for the whole server rather than per worker.
+    Every take is a write transaction that may wait on another worker's.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def init(self):
+        with self._lock:
+            self._connect()
+
+    def _connect(self):
+        # Called with the lock held
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " key TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        # Wall clock: monotonic clocks aren't comparable across processes
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                state = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = self._refill(state, rate, burst, now)
+                allowed = tokens >= 1
+                conn.execute(
+                    "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (key, tokens - 1 if allowed else tokens, now),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return 0 if allowed else (1 - tokens) / rate
+
+    def give_back(self, key: str, burst: int):
+        with self._lock:
+            self._connect().execute(
+                "UPDATE buckets SET tokens = MIN(?, tokens + 1) WHERE key = ?", (float(burst), key)
+            )
+
+
+def create_store(name: str) -> BucketStore:
+    if name == "sqlite":
+        return SQLiteBucketStore(settings.RATE_LIMIT_SQLITE_PATH)
+    if name == "memory":
+        return MemoryBucketStore()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {name!r} (expected 'memory' or 'sqlite')")
+
+
+class AdmissionControl:
+    """
+    Gate in front of every request that would start a yt-dlp extraction
+    (cache hits never get here). Sheds load first, while the extraction
+    pool's queue is deep or its recent latency is high, then applies a
+    token bucket per client address and one shared by all clients.
+    """
+
+    def __init__(self, store: BucketStore, client_rate: float, client_burst: int, global_rate: float,
+                 global_burst: int, shed_queue_depth: int, shed_latency: float, shed_retry_after: int):
+        self.store = store
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.shed_queue_depth = shed_queue_depth
+        self.shed_latency = shed_latency
+        self.shed_retry_after = shed_retry_after
+
+        self.limited = {"client": 0, "global": 0}
+        self.shed = {"queue_depth": 0, "latency": 0}
+
+    def _check_load(self):
+        if extraction_pool.queued >= self.shed_queue_depth:
+            self.shed["queue_depth"] += 1
+            raise Overloaded("queue_depth", self.shed_retry_after)
+
+        # Latency only counts while work is in flight: an idle pool admits,
+        # and the next extractions refresh the average
+        if extraction_pool.pending and extraction_pool.latency >= self.shed_latency:
+            self.shed["latency"] += 1
+            raise Overloaded("latency", self.shed_retry_after)
+
+    async def _store(self, method, *args):
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def check(self, client: str):
+        """
+        Admit one extraction for `client`, or raise RateLimited / Overloaded
+        """
+        self._check_load()
+
+        wait = await self._store(self.store.take, f"client:{client}", self.client_rate, self.client_burst)
+        if wait:
+            self.limited["client"] += 1
+            raise RateLimited("client", math.ceil(wait))
+
+        wait = await self._store(self.store.take, GLOBAL_KEY, self.global_rate, self.global_burst)
+        if wait:
+            # Not this client's fault: don't charge them for it
+            await self._store(self.store.give_back, f"client:{client}", self.client_burst)
+            self.limited["global"] += 1
+            raise RateLimited("global", math.ceil(wait))
+
+    def init(self):
+        """Create the store's storage; call once at startup, not at import"""
+        self.store.init()
+
+    def stats(self):
+        return {
+            "backend": type(self.store).__name__,
+            "rate_limited": dict(self.limited),
+            "shed": dict(self.shed),
+        }
+
+
+# Global admission control for the extraction-triggering routes
+admission = AdmissionControl(
+    store=create_store(settings.RATE_LIMIT_BACKEND),
+    client_rate=settings.RATE_LIMIT_CLIENT_RATE,
+    client_burst=settings.RATE_LIMIT_CLIENT_BURST,
+    global_rate=settings.RATE_LIMIT_GLOBAL_RATE,
+    global_burst=settings.RATE_LIMIT_GLOBAL_BURST,
+    shed_queue_depth=settings.SHED_QUEUE_DEPTH,
+    shed_latency=settings.SHED_LATENCY,
+    shed_retry_after=settings.EXTRACTION_RETRY_AFTER,
+)
+
+registry.counter("admission_rate_limited_total", "Extraction requests refused with 429", labels=("scope",),
+                 callback=lambda: {(scope,): n for scope, n in admission.limited.items()})
+registry.counter("admission_shed_total", "Extraction requests shed with 503", labels=("reason",),
+                 callback=lambda: {(reason,): n for reason, n in admission.shed.items()})
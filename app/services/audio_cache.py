@@ -0,0 +1,312 @@
+import asyncio
+import mimetypes
+import os
+import time
+import httpx
+from app.config import settings
+from app.metrics import registry
+from app.services.url_cache import url_cache
+from app.services.downloader import resolve_audio_url, refresh_video_links, VideoUnavailable
+from app.services.prefetch import prefetcher
+from app.services.extraction_pool import ExtractionQueueFull, ExtractionTimeout
+from app.services.circuit_breaker import CircuitOpen
+from app.services.leader import LeaderLock
+
+# File extension per upstream Content-Type; the extension is all we keep,
+# FileResponse derives the media type back from it
+EXTENSIONS = {
+    "audio/mp4": ".m4a",
+    "audio/webm": ".webm",
+    "audio/mpeg": ".mp3",
+    "audio/ogg": ".ogg",
+}
+PARTIAL_SUFFIX = ".part"
+
+mimetypes.add_type("audio/mp4", ".m4a")
+mimetypes.add_type("audio/webm", ".webm")
+
+
+class CachedFile:
+    __slots__ = ("path", "size", "accessed_at")
+
+    def __init__(self, path: str, size: int, accessed_at: float):
+        self.path = path
+        self.size = size
+        self.accessed_at = accessed_at
+
+    @property
+    def media_type(self):
+        return mimetypes.guess_type(self.path)[0] or "application/octet-stream"
+
+
+class AudioCache:
+    """
+    Size-bounded on-disk copies of the most played lectures.
+    A scheduler job ranks videos by the prefetcher's (decayed) play counts
+    and downloads the top ones that aren't on disk yet, a few per run. When
+    the cache is full the coldest file goes first: lowest play count ("lfu",
+    ties broken by last access) or least recently played ("lru"); a new
+    file is only admitted if it's hotter than what it would push out.
+    Downloads and evictions happen on one worker per host, the `leader`,
+    so the size bound holds for the whole directory; its play counts and
+    access times are its own share of the traffic. Files are written to a
+    .part name and renamed, so no worker serves a half-written file; every
+    worker rescans the directory on each run to pick up the leader's
+    changes. Disk work
+    (scans, writes) runs in threads, never on the event loop; until the
+    first scan, get() reports nothing as cached.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_file_bytes: int, top_n: int, min_plays: float,
+                 max_per_run: int, eviction: str, timeout: float, leader: LeaderLock):
+        if eviction not in ("lfu", "lru"):
+            raise ValueError(f"Unknown AUDIO_CACHE_EVICTION: {eviction!r} (expected 'lfu' or 'lru')")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.top_n = top_n
+        self.min_plays = min_plays
+        self.max_per_run = max_per_run
+        self.eviction = eviction
+        self.timeout = timeout
+        self.leader = leader
+
+        self._files = {}  # YouTube video id -> CachedFile
+        self._scanned = False
+        self._client = None
+
+        self.hits = 0
+        self.downloads = 0
+        self.failed = 0
+        self.evictions = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, connect=10), follow_redirects=True)
+        return self._client
+
+    @property
+    def used_bytes(self):
+        return sum(f.size for f in self._files.values())
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        files = {}
+        for entry in os.scandir(self.directory):
+            name, ext = os.path.splitext(entry.name)
+            if ext == PARTIAL_SUFFIX or not entry.is_file():
+                continue
+            known = self._files.get(name)
+            stat = entry.stat()
+            files[name] = CachedFile(entry.path, stat.st_size, known.accessed_at if known else stat.st_mtime)
+        self._files = files
+        self._scanned = True
+
+    async def scan(self):
+        await asyncio.to_thread(self._scan)
+
+    def peek(self, video_id: str):
+        """
+        The cached file of a video, or None; doesn't count as a hit or a play
+        """
+        if not self._scanned:
+            return None
+
+        cached = self._files.get(video_id)
+        if cached is None:
+            return None
+
+        # The leader may have evicted it
+        if not os.path.exists(cached.path):
+            del self._files[video_id]
+            return None
+
+        return cached
+
+    def get(self, video_id: str):
+        """
+        The cached file of a video, or None; counts as a play for LRU
+        """
+        cached = self.peek(video_id)
+        if cached is None:
+            return None
+
+        cached.accessed_at = time.time()
+        self.hits += 1
+        return cached
+
+    def _score(self, video_id: str):
+        cached = self._files.get(video_id)
+        accessed_at = cached.accessed_at if cached else time.time()
+        if self.eviction == "lru":
+            return (accessed_at,)
+        return (prefetcher.play_counts.get(video_id, 0), accessed_at)
+
+    def _make_room(self, video_id: str, size: int):
+        """
+        Evict colder files until `size` more bytes fit; False if that would
+        mean evicting something hotter than `video_id`
+        """
+        used = self.used_bytes
+        victims = []
+        for victim in sorted(self._files, key=self._score):
+            if used + size <= self.max_bytes:
+                break
+            if self._score(victim) >= self._score(video_id):
+                return False
+            victims.append(victim)
+            used -= self._files[victim].size
+
+        if used + size > self.max_bytes:
+            return False
+
+        for victim in victims:
+            try:
+                os.remove(self._files[victim].path)
+            except FileNotFoundError:
+                pass
+            del self._files[victim]
+            self.evictions += 1
+        return True
+
+    def _candidates(self):
+        for video_id, plays in prefetcher.play_counts.most_common(self.top_n):
+            if plays >= self.min_plays and video_id not in self._files:
+                yield video_id
+
+    async def _open(self, video_id: str):
+        url = await resolve_audio_url(video_id)
+        response = await self.client.send(self.client.build_request("GET", url), stream=True) if url else None
+        if response is not None and response.status_code == 403:
+            # Stale or IP-bound URL: get a fresh one once
+            await response.aclose()
+            await url_cache.invalidate(video_id)
+            url = (await refresh_video_links(video_id))[1]
+            response = await self.client.send(self.client.build_request("GET", url), stream=True) if url else None
+        return response
+
+    async def download(self, video_id: str):
+        """
+        Fetch one video's audio into the cache; True on success
+        """
+        response = await self._open(video_id)
+        if response is None:
+            return False
+
+        partial = os.path.join(self.directory, video_id + PARTIAL_SUFFIX)
+        owns_partial = False
+        try:
+            if response.status_code != 200:
+                return False
+
+            size = int(response.headers.get("content-length") or 0)
+            if not size or size > self.max_file_bytes:
+                return False
+
+            content_type = response.headers.get("content-type", "").split(";")[0].strip()
+            path = os.path.join(self.directory, video_id + EXTENSIONS.get(content_type, ".m4a"))
+
+            try:
+                # O_EXCL: if another worker is already downloading it, let it
+                fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                return False
+            owns_partial = True
+
+            # Only evict once this worker has claimed the download
+            if not self._make_room(video_id, size):
+                os.close(fd)
+                return False
+
+            written = 0
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in response.aiter_raw():
+                    written += len(chunk)
+                    if written > size:
+                        raise ValueError("more data than Content-Length")
+                    await asyncio.to_thread(f.write, chunk)
+
+            if written != size:
+                raise ValueError(f"truncated download ({written} of {size} bytes)")
+
+            os.replace(partial, path)
+            self._files[video_id] = CachedFile(path, size, time.time())
+            return True
+
+        except (httpx.HTTPError, OSError, ValueError) as e:
+            print(f"⚠️ Audio cache download of {video_id} failed: {e}")
+            return False
+
+        finally:
+            await response.aclose()
+            if owns_partial and os.path.exists(partial):
+                os.remove(partial)
+
+    async def run(self):
+        """
+        Scheduler job: pick up changes on disk; on the leader, download up
+        to `max_per_run` of the hottest uncached videos
+        """
+        await self.scan()
+        if not self.leader.acquire():
+            return
+
+        budget = self.max_per_run
+        for video_id in list(self._candidates()):
+            if budget <= 0:
+                break
+            budget -= 1
+
+            try:
+                ok = await self.download(video_id)
+            except (ExtractionQueueFull, ExtractionTimeout, CircuitOpen, httpx.HTTPError):
+                # Extraction is busy with listeners: try again next run
+                self.failed += 1
+                break
+            except VideoUnavailable:
+                ok = False
+
+            if ok:
+                self.downloads += 1
+            else:
+                self.failed += 1
+
+    def stats(self):
+        return {
+            "leader": self.leader.held,
+            "files": len(self._files),
+            "used_bytes": self.used_bytes,
+            "max_bytes": self.max_bytes,
+            "eviction": self.eviction,
+            "hits": self.hits,
+            "downloads": self.downloads,
+            "failed": self.failed,
+            "evictions": self.evictions,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global on-disk cache, filled by the scheduler when AUDIO_CACHE_ENABLED
+audio_cache = AudioCache(
+    directory=settings.AUDIO_CACHE_DIR,
+    max_bytes=settings.AUDIO_CACHE_MAX_BYTES,
+    max_file_bytes=settings.AUDIO_CACHE_MAX_FILE_BYTES,
+    top_n=settings.AUDIO_CACHE_TOP_N,
+    min_plays=settings.AUDIO_CACHE_MIN_PLAYS,
+    max_per_run=settings.AUDIO_CACHE_MAX_PER_RUN,
+    eviction=settings.AUDIO_CACHE_EVICTION,
+    timeout=settings.AUDIO_CACHE_TIMEOUT,
+    leader=LeaderLock(settings.AUDIO_CACHE_DIR.rstrip("/") + ".lock"),
+)
+
+registry.counter("audio_cache_hits_total", "Plays served from the on-disk audio cache",
+                 callback=lambda: audio_cache.hits)
+registry.gauge("audio_cache_bytes", "Bytes used by the on-disk audio cache", callback=lambda: audio_cache.used_bytes)
+registry.counter("audio_cache_evictions_total", "Files evicted from the on-disk audio cache",
+                 callback=lambda: audio_cache.evictions)
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from sqlalchemy import select
+from app.db.models import Playlist, Video, CatalogVersion
+from app.db.session import AsyncSessionLocal as async_session
+from app.services.search import SearchIndex
+
+# Column order of the compact row tuples (and of the API's full field set)
+PLAYLIST_FIELDS = ["id", "playlist_id", "name", "description", "thumbnail"]
+VIDEO_FIELDS = ["id", "video_id", "playlist_id", "title", "thumbnail", "duration"]
+
+
+class Catalog:
+    """
+    Immutable in-memory snapshot of all playlists and videos.
+    Rows are plain tuples sorted by id; per-playlist video lists, the
+    id / YouTube-id indexes and the search index are built once at load time.
+    """
+
+    def __init__(self, playlists: list[tuple], videos: list[tuple]):
+        self.playlists = tuple(playlists)
+        self._playlist_keys = [p[0] for p in self.playlists]
+        self._playlists_by_id = {p[0]: p for p in self.playlists}
+
+        by_playlist = defaultdict(list)
+        for v in videos:
+            by_playlist[v[2]].append(v)
+        self._videos_by_playlist = {pid: tuple(vs) for pid, vs in by_playlist.items()}
+        self._video_keys = {pid: [v[0] for v in vs] for pid, vs in by_playlist.items()}
+
+        self._videos_by_id = {v[0]: v for v in videos}
+        self._videos_by_youtube_id = {v[1]: v for v in videos}
+        self.search_index = SearchIndex(self.playlists, videos)
+
+        # Content hash: identical data gives the same version on every worker
+        digest = hashlib.sha1(repr((self.playlists, videos)).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+        self.loaded_at = time.time()
+
+    @staticmethod
+    def _page(rows, keys, limit: int, after: int | None):
+        start = bisect_right(keys, after) if after is not None else 0
+        page = rows[start:start + limit]
+        next_cursor = page[-1][0] if start + limit < len(rows) else None
+        return page, next_cursor
+
+    @staticmethod
+    def as_dict(row: tuple, all_fields: list[str], fields: list[str] = None):
+        if fields is None:
+            return dict(zip(all_fields, row))
+        return {f: row[all_fields.index(f)] for f in fields}
+
+    def page_playlists(self, limit: int, after: int | None = None, fields: list[str] = None):
+        page, next_cursor = self._page(self.playlists, self._playlist_keys, limit, after)
+        return [self.as_dict(p, PLAYLIST_FIELDS, fields) for p in page], next_cursor
+
+    def page_videos(self, playlist_id: int, limit: int, after: int | None = None, fields: list[str] = None):
+        rows = self._videos_by_playlist.get(playlist_id, ())
+        keys = self._video_keys.get(playlist_id, [])
+        page, next_cursor = self._page(rows, keys, limit, after)
+        return [self.as_dict(v, VIDEO_FIELDS, fields) for v in page], next_cursor
+
+    def playlist_window(self, playlist_id: int, offset: int, limit: int):
+        """
+        Full rows of a playlist's videos [offset, offset + limit), ordered by id
+        """
+        rows = self._videos_by_playlist.get(playlist_id, ())
+        return [self.as_dict(v, VIDEO_FIELDS) for v in rows[offset:offset + limit]]
+
+    def playlist(self, playlist_id: int):
+        row = self._playlists_by_id.get(playlist_id)
+        return self.as_dict(row, PLAYLIST_FIELDS) if row else None
+
+    def video(self, video_id: int):
+        row = self._videos_by_id.get(video_id)
+        return self.as_dict(row, VIDEO_FIELDS) if row else None
+
+    def video_by_youtube_id(self, youtube_video_id: str):
+        row = self._videos_by_youtube_id.get(youtube_video_id)
+        return self.as_dict(row, VIDEO_FIELDS) if row else None
+
+    def search(self, query: str, limit: int, offset: int = 0, kind: str = None):
+        """
+        Ranked search page: ([{"type", "score", ...fields}], total)
+        """
+        results, total = self.search_index.search(query, kind, offset + limit)
+        page = [
+            {
+                "type": doc_kind,
+                "score": score,
+                **self.as_dict(row, PLAYLIST_FIELDS if doc_kind == "playlist" else VIDEO_FIELDS),
+            }
+            for score, doc_kind, row in results[offset:]
+        ]
+        return page, total
+
+    def playlists_differ(self, rows: list[dict]):
+        """
+        True if freshly synced playlist rows differ from this snapshot
+        """
+        current = {p[1]: p[2:] for p in self.playlists}
+        return any(
+            current.get(r["playlist_id"]) != (r["name"], r.get("description"), r["thumbnail"])
+            for r in rows
+        )
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "playlists": len(self.playlists),
+            "videos": len(self._videos_by_id),
+            "loaded_at": self.loaded_at,
+        }
+
+
+class CatalogStore:
+    """
+    Holds the current Catalog. A reload builds a complete new snapshot and
+    swaps the reference in one assignment, so readers never see a mix.
+    `current` is None until the first load (routes then fall back to the DB).
+    """
+
+    def __init__(self):
+        self.current = None
+        self._marker = None
+        self._lock = None
+
+    async def _change_marker(self, db):
+        # Bumped by every upsert that changed rows, on whichever worker ran it
+        result = await db.execute(select(CatalogVersion.version))
+        return result.scalar_one_or_none()
+
+    async def load(self, if_missing: bool = False):
+        """
+        Build a new snapshot from the DB. With `if_missing`, only when there
+        is none yet: concurrent first callers wait for one load and share it.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if if_missing and self.current is not None:
+                return self.current
+
+            async with async_session() as db:
+                marker = await self._change_marker(db)
+                playlists = await db.execute(
+                    select(*[getattr(Playlist, f) for f in PLAYLIST_FIELDS]).order_by(Playlist.id)
+                )
+                videos = await db.execute(
+                    select(*[getattr(Video, f) for f in VIDEO_FIELDS]).order_by(Video.id)
+                )
+                playlist_rows = [tuple(row) for row in playlists]
+                video_rows = [tuple(row) for row in videos]
+
+            # Building the indexes is CPU work: keep it off the event loop
+            catalog = await asyncio.to_thread(Catalog, playlist_rows, video_rows)
+
+            self.current = catalog
+            self._marker = marker
+
+        print(f"📚 Catalog loaded: {catalog.stats()['playlists']} playlists, "
+              f"{catalog.stats()['videos']} videos (version {catalog.version})")
+        return catalog
+
+    async def refresh_if_changed(self):
+        """
+        Scheduler job: reload when another worker's sync committed changes
+        """
+        async with async_session() as db:
+            marker = await self._change_marker(db)
+
+        if self.current is None or marker != self._marker:
+            await self.load()
+
+
+# Global snapshot shared by the read routers of this worker
+catalog_store = CatalogStore()
@@ -0,0 +1,161 @@
+import math
+import time
+from collections import deque
+from app.config import settings
+from app.metrics import registry
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Numeric state for the /metrics gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency that is failing"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"Circuit {name} is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and outcomes are recorded. Opens after
+    `failure_threshold` consecutive failures, or when at least `min_calls`
+    calls in the last `window` seconds failed at `error_rate` or worse.
+    Open: calls fail fast with CircuitOpen for `open_seconds`.
+    Half-open: up to `half_open_probes` calls at once are let through; a
+    success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, error_rate: float, min_calls: int, window: float,
+                 open_seconds: float, half_open_probes: int):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._consecutive_failures = 0
+        self._recent = deque()  # (monotonic time, ok)
+
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def is_open(self):
+        return self.state == OPEN
+
+    def before_call(self):
+        """
+        Claim permission for one call; raises CircuitOpen when not allowed.
+        Every successful claim must be followed by after_call.
+        """
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_probes):
+            self.rejected += 1
+            remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+            raise CircuitOpen(self.name, max(1, math.ceil(remaining)))
+
+        if state == HALF_OPEN:
+            self._probes += 1
+
+    def after_call(self, ok: bool | None):
+        """
+        Record the outcome of a call; None means no verdict (e.g. the call
+        never reached the dependency) and only releases a half-open probe
+        """
+        if self._state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+        if ok is None:
+            return
+
+        now = time.monotonic()
+        self._recent.append((now, ok))
+        while self._recent and now - self._recent[0][0] > self.window:
+            self._recent.popleft()
+
+        if ok:
+            self.successes += 1
+            self._consecutive_failures = 0
+            if self._state == HALF_OPEN:
+                self._close()
+            return
+
+        self.failures += 1
+        self._consecutive_failures += 1
+        if self._state == HALF_OPEN or self._should_open():
+            self._open()
+
+    def _should_open(self):
+        if self._state != CLOSED:
+            return False
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._recent) < self.min_calls:
+            return False
+        failed = sum(1 for _, ok in self._recent if not ok)
+        return failed / len(self._recent) >= self.error_rate
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        print(f"⚠️ Circuit {self.name} opened ({self._consecutive_failures} consecutive failures)")
+
+    def _close(self):
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._recent.clear()
+        print(f"✅ Circuit {self.name} closed")
+
+    def stats(self):
+        recent_failed = sum(1 for _, ok in self._recent if not ok)
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "recent_calls": len(self._recent),
+            "recent_error_rate": round(recent_failed / len(self._recent), 4) if self._recent else 0.0,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
+
+
+# Breaker around yt-dlp extraction (see app/services/downloader.py)
+extractor_circuit = CircuitBreaker(
+    name="extractor",
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    error_rate=settings.CIRCUIT_ERROR_RATE,
+    min_calls=settings.CIRCUIT_MIN_CALLS,
+    window=settings.CIRCUIT_WINDOW,
+    open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+    half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES,
+)
+
+registry.gauge("extractor_circuit_state", "Extractor circuit: 0 closed, 1 half-open, 2 open",
+               callback=lambda: STATE_VALUES[extractor_circuit.state])
+registry.counter("extractor_circuit_failures_total", "Failed extractions seen by the circuit breaker",
+                 callback=lambda: extractor_circuit.failures)
+registry.counter("extractor_circuit_rejected_total", "Extractions refused while the circuit was open",
+                 callback=lambda: extractor_circuit.rejected)
+registry.counter("extractor_circuit_opened_total", "Times the extractor circuit opened",
+                 callback=lambda: extractor_circuit.opened)
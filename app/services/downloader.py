@@ -1,83 +1,250 @@
-from yt_dlp import YoutubeDL
+from app.services.url_cache import url_cache
+from app.services.singleflight import SingleFlight
+from app.services.extraction_pool import extraction_pool, ExtractionTimeout
+from app.services.circuit_breaker import extractor_circuit, CircuitOpen
+from app.config import settings
+from app.metrics import extraction_duration, extraction_failures
+from collections import OrderedDict
+import threading
+import time
+
+# One in-flight resolution per YouTube video id
+_inflight = SingleFlight()
+
+# yt-dlp error messages about the video itself (private, removed, region or
+# age restricted, not live yet): retrying won't help, and they say nothing
+# about whether extraction works. Anything else (network errors, bot
+# checks, extractor breakage) counts against the extractor circuit.
+UNAVAILABLE_MARKERS = (
+    "video unavailable",
+    "private video",
+    "has been removed",
+    "account associated with this video has been terminated",
+    "this video is not available",
+    "not made this video available in your country",
+    "confirm your age",
+    "members-only",
+    "join this channel",
+    "premieres in",
+    "this live event will begin",
+)
+
+# Negative cache of unavailable videos: video id -> (monotonic expiry, reason)
+UNAVAILABLE_MAX_ENTRIES = 1000
+_unavailable = OrderedDict()
+
+
+class VideoUnavailable(Exception):
+    """Raised when YouTube won't serve a video, as opposed to extraction failing"""
+
+    def __init__(self, video_id: str, reason: str):
+        super().__init__(f"Video {video_id} is unavailable: {reason}")
+        self.video_id = video_id
+        self.reason = reason
+
+
+def is_unavailable_error(error: Exception):
+    message = str(error).lower()
+    return any(marker in message for marker in UNAVAILABLE_MARKERS)
+
+
+# Shared options for the long-lived extractor instances.
+# Format selection is done by us on the full format list (see _pick_*),
+# so a single extract_info call yields both the mp4 and the audio URL.
+YDL_OPTS = {
+    "format": "bestaudio/best",
+    "quiet": True,
+    "skip_download": True,
+}
+
+# yt_dlp.YoutubeDL, imported on first extraction: importing yt-dlp loads
+# all of its extractors and is the slowest part of starting a worker
+YoutubeDL = None
+
+# YoutubeDL isn't thread-safe: keep one configured instance per pool thread
+_local = threading.local()
+
+
+def _get_ydl():
+    global YoutubeDL
+    ydl = getattr(_local, "ydl", None)
+    if ydl is None:
+        if YoutubeDL is None:
+            from yt_dlp import YoutubeDL
+        ydl = YoutubeDL(YDL_OPTS)
+        _local.ydl = ydl
+    return ydl
+
+
+def _pick_video(formats):
+    """
+    Equivalent of "best[ext=mp4]/best": best progressive (audio+video)
+    format, preferring mp4. yt-dlp sorts formats worst -> best.
+    """
+    progressive = [
+        f for f in formats
+        if f.get("url") and f.get("vcodec") != "none" and f.get("acodec") != "none"
+    ]
+    mp4 = [f for f in progressive if f.get("ext") == "mp4"]
+    candidates = mp4 or progressive
+    return candidates[-1]["url"] if candidates else None
+
+
+def _pick_audio(formats):
+    """
+    Equivalent of "bestaudio/best": best audio-only format,
+    falling back to the best format that carries audio at all.
+    """
+    audio_only = [
+        f for f in formats
+        if f.get("url") and f.get("acodec") != "none" and f.get("vcodec") == "none"
+    ]
+    if audio_only:
+        return audio_only[-1]["url"]
+
+    with_audio = [f for f in formats if f.get("url") and f.get("acodec") != "none"]
+    return with_audio[-1]["url"] if with_audio else None
+
+
+def extract_links(video_id: str):
+    """
+    One extract_info call, both URLs picked from the same format list
+    """
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    info = _get_ydl().extract_info(url, download=False)
+    formats = info.get("formats") or [info]
+    return _pick_video(formats), _pick_audio(formats)
 
 
 def get_video_links(video_id: str):
     """
-    Generates direct MP4 + MP3 download URLs using yt-dlp
+    Generates direct MP4 + MP3 download URLs using yt-dlp.
+    Raises VideoUnavailable for private / removed / blocked videos;
+    any other failure gives (None, None).
     """
+    start = time.perf_counter()
     try:
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        
-        # Options for video (MP4)
-        video_opts = {
-            "format": "best[ext=mp4]/best",
-            "quiet": True,
-            "skip_download": True
-        }
-        
-        # Options for audio (MP3/M4A)
-        audio_opts = {
-            "format": "bestaudio/best",
-            "quiet": True,
-            "skip_download": True
-        }
-        
-        # Get video URL
-        with YoutubeDL(video_opts) as ydl:
-            video_info = ydl.extract_info(url, download=False)
-            mp4 = video_info["url"]
-        
-        # Get audio URL
-        with YoutubeDL(audio_opts) as ydl:
-            audio_info = ydl.extract_info(url, download=False)
-            mp3 = audio_info["url"]
-        
-        return mp4, mp3
-    
+        mp4, mp3 = extract_links(video_id)
+
     except Exception as e:
+        if is_unavailable_error(e):
+            extraction_duration.observe(time.perf_counter() - start, outcome="unavailable")
+            extraction_failures.inc(reason="unavailable")
+            raise VideoUnavailable(video_id, str(e)) from e
+
         print("Downloader Error:", e)
+        extraction_duration.observe(time.perf_counter() - start, outcome="error")
+        extraction_failures.inc(reason="error")
         return None, None
 
+    if not mp3:
+        extraction_failures.inc(reason="no_audio")
+    extraction_duration.observe(time.perf_counter() - start, outcome="ok" if mp3 else "no_audio")
+    return mp4, mp3
+
+
+async def resolve_video_links(video_id: str):
+    """
+    Async entry point for the play routes.
+    Serves from the URL cache while the resolved URLs are still valid;
+    concurrent misses for the same video share a single extraction,
+    which runs on the bounded extraction pool (may raise
+    ExtractionQueueFull / ExtractionTimeout). While the extractor circuit
+    is open, URLs inside their safety margin are still served; otherwise
+    CircuitOpen is raised without waiting on yt-dlp. Videos YouTube
+    refused to serve raise VideoUnavailable, and keep raising it for
+    URL_CACHE_UNAVAILABLE_TTL seconds without another extraction.
+    """
+    cached = url_cache.get(video_id)
+    if cached:
+        return cached
+
+    try:
+        return await _inflight.do(video_id, lambda: _resolve_and_cache(video_id))
+    except CircuitOpen:
+        stale = url_cache.get_stale(video_id, settings.CIRCUIT_STALE_MIN_TTL)
+        if stale:
+            return stale
+        raise
+
+
+def is_resolving(video_id: str):
+    """
+    True while an extraction for this video is running; another request
+    for it just waits for that one instead of starting its own
+    """
+    return video_id in _inflight
+
+
+async def refresh_video_links(video_id: str):
+    """
+    Re-resolve regardless of what's cached (used by the background refresher)
+    """
+    return await _inflight.do(video_id, lambda: _resolve_and_cache(video_id))
+
+
+async def resolve_audio_url(video_id: str):
+    """
+    Audio-only variant for the player: shares the URL cache and in-flight
+    resolution with resolve_video_links, but doesn't need an mp4 to exist
+    """
+    _, mp3 = await resolve_video_links(video_id)
+    return mp3
+
+
+def _check_unavailable(video_id: str):
+    entry = _unavailable.get(video_id)
+    if entry is None:
+        return
+    expires_at, reason = entry
+    if expires_at <= time.monotonic():
+        del _unavailable[video_id]
+        return
+    raise VideoUnavailable(video_id, reason)
+
+
+def _remember_unavailable(video_id: str, reason: str):
+    _unavailable[video_id] = (time.monotonic() + settings.URL_CACHE_UNAVAILABLE_TTL, reason)
+    _unavailable.move_to_end(video_id)
+    while len(_unavailable) > UNAVAILABLE_MAX_ENTRIES:
+        _unavailable.popitem(last=False)
+
+
+async def _resolve_and_cache(video_id: str):
+    _check_unavailable(video_id)
+    extractor_circuit.before_call()
+
+    ok = None
+    try:
+        mp4, mp3 = await extraction_pool.run(get_video_links, video_id)
+        ok = bool(mp3)
+    except VideoUnavailable as e:
+        # YouTube answered, the video is the problem: no verdict on the extractor
+        _remember_unavailable(video_id, e.reason)
+        raise
+    except ExtractionTimeout:
+        ok = False
+        raise
+    finally:
+        # A rejected or cancelled call says nothing about YouTube's health
+        extractor_circuit.after_call(ok)
+
+    # The audio URL is what listeners need; cache even if no mp4 was found
+    if mp3:
+        await url_cache.set(video_id, (mp4, mp3), mp4, mp3)
+
+    return mp4, mp3
+
 
 def get_audio_url(video_id: str):
     """
     Get only the audio URL (for background playback)
     """
-    try:
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "quiet": True,
-            "skip_download": True
-        }
-        
-        with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            return info["url"]
-    
-    except Exception as e:
-        print("Downloader Error:", e)
-        return None
+    return get_video_links(video_id)[1]
 
 
 def get_video_url(video_id: str):
     """
     Get only the video URL
     """
-    try:
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        
-        ydl_opts = {
-            "format": "best[ext=mp4]/best",
-            "quiet": True,
-            "skip_download": True
-        }
-        
-        with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            return info["url"]
-    
-    except Exception as e:
-        print("Downloader Error:", e)
-        return None
\ No newline at end of file
+    return get_video_links(video_id)[0]
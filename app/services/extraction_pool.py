@@ -0,0 +1,120 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+from app.metrics import registry
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_WEIGHT = 0.2
+
+
+class ExtractionQueueFull(Exception):
+    """Raised when the pool already holds max_workers + max_queue jobs"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Extraction queue is full")
+        self.retry_after = retry_after
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a single extraction exceeds the per-call timeout"""
+
+
+class ExtractionPool:
+    """
+    Dedicated worker pool for blocking yt-dlp work.
+    Keeps extraction off the event loop and bounds how much of it can
+    pile up: at most `max_workers` run at once, at most `max_queue` wait
+    behind them, everything beyond that is rejected immediately.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout: float, retry_after: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = None
+
+        # Jobs submitted and not yet finished (running + queued).
+        # A job that timed out keeps its slot until its thread really returns.
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+        # Exponentially weighted moving average of submit -> done time
+        # (queueing included), used for load shedding
+        self.latency = 0.0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="extract",
+            )
+        return self._executor
+
+    @property
+    def queued(self):
+        return max(0, self.pending - self.max_workers)
+
+    def is_full(self):
+        return self.pending >= self.max_workers + self.max_queue
+
+    async def run(self, fn, *args):
+        if self.is_full():
+            self.rejected += 1
+            raise ExtractionQueueFull(self.retry_after)
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        submitted = time.perf_counter()
+        future = loop.run_in_executor(self.executor, fn, *args)
+        future.add_done_callback(lambda f: self._on_done(f, submitted))
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ExtractionTimeout(f"Extraction took longer than {self.timeout}s")
+
+    def _on_done(self, future, submitted: float):
+        self.pending -= 1
+        self.completed += 1
+        self.latency += LATENCY_EWMA_WEIGHT * (time.perf_counter() - submitted - self.latency)
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "latency": round(self.latency, 3),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global pool shared by all routes of this worker
+extraction_pool = ExtractionPool(
+    max_workers=settings.EXTRACTION_MAX_WORKERS,
+    max_queue=settings.EXTRACTION_MAX_QUEUE,
+    timeout=settings.EXTRACTION_TIMEOUT,
+    retry_after=settings.EXTRACTION_RETRY_AFTER,
+)
+
+registry.gauge("extraction_pool_pending", "Extractions running or queued", callback=lambda: extraction_pool.pending)
+registry.gauge("extraction_pool_queued", "Extractions waiting for a worker", callback=lambda: extraction_pool.queued)
+registry.counter("extraction_pool_rejected_total", "Extractions rejected with 503", callback=lambda: extraction_pool.rejected)
+registry.counter("extraction_pool_timeouts_total", "Extractions that hit the per-call timeout", callback=lambda: extraction_pool.timeouts)
+registry.gauge("extraction_pool_latency_seconds", "Moving average of extraction latency incl. queueing",
+               callback=lambda: extraction_pool.latency)
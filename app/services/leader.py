@@ -0,0 +1,32 @@
+import fcntl
+
+
+class LeaderLock:
+    """
+    Elects one worker per host for a background job: the one holding an
+    exclusive flock on `path`. It's tried without waiting and kept until
+    the process exits; the OS then releases it and the next worker to try
+    takes over.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        """
+        True if this worker is (now) the leader
+        """
+        if self._file is None:
+            lock_file = open(self.path, "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._file = lock_file
+        return True
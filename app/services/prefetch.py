@@ -0,0 +1,255 @@
+import asyncio
+import heapq
+import sqlite3
+import threading
+from collections import Counter
+from app.config import settings
+from app.services.url_cache import url_cache
+from app.services.downloader import refresh_video_links, VideoUnavailable
+from app.services.extraction_pool import (
+    extraction_pool,
+    ExtractionQueueFull,
+    ExtractionTimeout,
+)
+from app.services.circuit_breaker import CircuitOpen
+from app.services.leader import LeaderLock
+
+
+class MemoryWarmQueue:
+    """
+    Newly synced videos waiting to be warmed, for a single worker with the
+    memory URL cache. Keeps the `maxlen` most recently published videos;
+    pop() returns the newest first.
+    """
+
+    blocking = False
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._videos = {}  # video id -> publishedAt
+
+    def push(self, videos):
+        for video_id, published_at in videos:
+            self._videos.setdefault(video_id, published_at)
+        if len(self._videos) > self.maxlen:
+            newest = heapq.nlargest(self.maxlen, self._videos.items(), key=lambda item: item[1])
+            self._videos = dict(newest)
+
+    def pop(self):
+        if not self._videos:
+            return None
+        video_id = max(self._videos, key=self._videos.get)
+        del self._videos[video_id]
+        return video_id
+
+    def __len__(self):
+        return len(self._videos)
+
+
+class SQLiteWarmQueue:
+    """
+    Same queue in a table of the shared SQLite URL cache file: the sync
+    runs on whichever worker holds the sync lock, the prefetch leader
+    drains the queue.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, maxlen: int):
+        self.path = path
+        self.maxlen = maxlen
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # Called with the lock held
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prefetch_warm ("
+                " video_id TEXT PRIMARY KEY,"
+                " published_at TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def push(self, videos):
+        """
+        Queue (video id, publishedAt) pairs, dropping the oldest beyond `maxlen`
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR IGNORE INTO prefetch_warm (video_id, published_at) VALUES (?, ?)", videos)
+            conn.execute(
+                "DELETE FROM prefetch_warm WHERE video_id NOT IN "
+                "(SELECT video_id FROM prefetch_warm ORDER BY published_at DESC LIMIT ?)",
+                (self.maxlen,),
+            )
+
+    def pop(self):
+        """
+        The newest queued video id, or None
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "DELETE FROM prefetch_warm WHERE video_id = "
+                "(SELECT video_id FROM prefetch_warm ORDER BY published_at DESC LIMIT 1) "
+                "RETURNING video_id"
+            ).fetchone()
+        return row[0] if row else None
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM prefetch_warm").fetchone()[0]
+
+
+class Prefetcher:
+    """
+    Keeps playback URLs of hot videos warm.
+    Play frequency is tracked per YouTube video id (with exponential decay
+    so it follows current popularity). On every run the top-N videos whose
+    cached URLs are missing or about to expire get re-resolved, followed by
+    the newest videos added by the sync - at most `max_per_run` per run.
+    Only one worker per host refreshes, the `leader`, and with several
+    workers only into the shared (SQLite) URL cache, so the background
+    extraction load doesn't grow with the number of workers.
+    Its play counts are its own share of the traffic, a sample of the
+    host's popularity.
+    """
+
+    def __init__(self, top_n: int, refresh_window: int, max_per_run: int, decay: float,
+                 warm_queue=None, leader: LeaderLock = None):
+        self.top_n = top_n
+        self.refresh_window = refresh_window
+        self.max_per_run = max_per_run
+        self.decay = decay
+        self.warm_queue = warm_queue
+        self.leader = leader
+
+        self.play_counts = Counter()
+
+        self.refreshed = 0
+        self.failed = 0
+
+    @property
+    def enabled(self):
+        return self.warm_queue is not None
+
+    def record_play(self, video_id: str):
+        self.play_counts[video_id] += 1
+
+    async def warm(self, videos):
+        """
+        Queue freshly synced (video id, publishedAt) pairs for the leader
+        """
+        if self.enabled and videos:
+            await self._queue(self.warm_queue.push, list(videos))
+
+    async def _queue(self, method, *args):
+        if self.warm_queue.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def _needs_refresh(self, video_id: str):
+        ttl = url_cache.ttl(video_id)
+        return ttl is None or ttl < self.refresh_window
+
+    def _hot(self):
+        for video_id, _ in self.play_counts.most_common(self.top_n):
+            if self._needs_refresh(video_id):
+                yield video_id
+
+    def decay_plays(self):
+        """
+        Scheduler job on every worker: age play counts by `decay`, so they
+        follow current popularity whether or not this worker prefetches
+        """
+        for video_id in list(self.play_counts):
+            self.play_counts[video_id] *= self.decay
+            if self.play_counts[video_id] < 0.5:
+                del self.play_counts[video_id]
+
+    async def _refresh(self, video_id: str):
+        """
+        Re-resolve one video; False when extraction is too busy to go on
+        """
+        try:
+            _, mp3 = await refresh_video_links(video_id)
+        except (ExtractionQueueFull, ExtractionTimeout, CircuitOpen):
+            self.failed += 1
+            return False
+        except VideoUnavailable:
+            mp3 = None
+
+        if mp3:
+            self.refreshed += 1
+        else:
+            self.failed += 1
+        return True
+
+    async def run(self):
+        """
+        Scheduler job: refresh up to `max_per_run` videos (leader only)
+        """
+        if not self.enabled or self.max_per_run <= 0 or not self.leader.acquire():
+            return
+
+        budget = self.max_per_run
+        seen = set()
+
+        for video_id in self._hot():
+            # Live traffic first: don't queue behind listeners
+            if budget <= 0 or extraction_pool.queued > 0:
+                break
+            budget -= 1
+            seen.add(video_id)
+            if not await self._refresh(video_id):
+                break
+
+        while budget > 0 and extraction_pool.queued == 0:
+            video_id = await self._queue(self.warm_queue.pop)
+            if video_id is None:
+                break
+            if video_id in seen or url_cache.ttl(video_id) is not None:
+                continue
+            budget -= 1
+            if not await self._refresh(video_id):
+                break
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "leader": self.leader.held,
+            "tracked": len(self.play_counts),
+            "warm_queue": len(self.warm_queue) if self.enabled else 0,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+        }
+
+
+def create_warm_queue():
+    """
+    The warm queue, or None when prefetching is off. With more than one
+    worker it needs the URL cache they share: with the per-process memory
+    backend, warming the leader's cache wouldn't help the others.
+    """
+    if not settings.PREFETCH_ENABLED:
+        return None
+    if settings.URL_CACHE_BACKEND == "sqlite":
+        return SQLiteWarmQueue(settings.URL_CACHE_SQLITE_PATH, settings.PREFETCH_WARM_QUEUE)
+    if settings.WEB_CONCURRENCY == 1:
+        return MemoryWarmQueue(settings.PREFETCH_WARM_QUEUE)
+    return None
+
+
+# Global prefetcher fed by the play routes and the sync job
+prefetcher = Prefetcher(
+    top_n=settings.PREFETCH_TOP_N,
+    refresh_window=settings.PREFETCH_REFRESH_WINDOW,
+    max_per_run=settings.PREFETCH_MAX_PER_RUN,
+    decay=settings.PREFETCH_DECAY,
+    warm_queue=create_warm_queue(),
+    leader=LeaderLock(settings.URL_CACHE_SQLITE_PATH + ".prefetch.lock"),
+)
@@ -0,0 +1,182 @@
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+# Harakat, tanween, shadda, sukun, superscript alef and Quranic marks
+_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]")
+_TATWEEL = "\u0640"
+_NON_WORD = re.compile(r"[^\w]+")
+
+_CHAR_MAP = str.maketrans({
+    # alef forms (hamza above / below, madda, wasla) -> bare alef
+    "\u0623": "\u0627",
+    "\u0625": "\u0627",
+    "\u0622": "\u0627",
+    "\u0671": "\u0627",
+    # alef maqsura, farsi ya -> ya
+    "\u0649": "\u064a",
+    "\u06cc": "\u064a",
+    # ta marbuta -> ha
+    "\u0629": "\u0647",
+    # hamza on waw / ya -> waw / ya
+    "\u0624": "\u0648",
+    "\u0626": "\u064a",
+    # farsi kaf -> kaf
+    "\u06a9": "\u0643",
+    # Arabic-Indic and extended digits -> ASCII
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+    **{chr(0x06f0 + d): str(d) for d in range(10)},
+})
+
+# Definite article with its common attached conjunctions / prepositions
+_ARTICLES = ("\u0648\u0627\u0644", "\u0628\u0627\u0644", "\u0643\u0627\u0644", "\u0641\u0627\u0644", "\u0644\u0644", "\u0627\u0644")
+
+# Field weights: a hit in a title counts more than one in a description
+TITLE_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+# A token that only prefix-matches (user still typing) counts less
+PREFIX_FACTOR = 0.6
+# Shorter last words match exactly only: a prefix like "ال" covers most of the index
+MIN_PREFIX_LENGTH = 3
+
+
+def normalize_arabic(text: str) -> str:
+    """
+    Fold Arabic spelling variants so that e.g. "الصلاة", "الصلاه" and
+    "الصَّلَاة" all match: strip diacritics and tatweel, unify
+    alef / ya / ta-marbuta forms, lowercase Latin text
+    """
+    if not text:
+        return ""
+    text = _DIACRITICS.sub("", text).replace(_TATWEEL, "")
+    return text.translate(_CHAR_MAP).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _NON_WORD.split(normalize_arabic(text)) if t]
+
+
+def index_terms(token: str):
+    """
+    A token plus its article-less stem, so "صلاه" also finds "الصلاه"
+    """
+    yield token
+    for article in _ARTICLES:
+        if token.startswith(article) and len(token) - len(article) >= 2:
+            yield token[len(article):]
+            break
+
+
+def query_term(token: str) -> str:
+    """
+    The term a query token is looked up by: its article-less stem when it
+    has one, so "بالصلاة" finds what "الصلاة" and "صلاه" find. The stem's
+    postings cover the token's own, since index_terms indexes both.
+    """
+    *_, term = index_terms(token)
+    return term
+
+
+class SearchIndex:
+    """
+    In-process inverted index over playlist names/descriptions and video
+    titles. Built from the catalog rows whenever a new snapshot is loaded.
+    Every query token must match exactly, except the last one, which may
+    also be a prefix (the user is still typing it); results are ranked by
+    field-weighted IDF.
+    """
+
+    def __init__(self, playlists, videos):
+        # doc number -> (kind, row); rows are the catalog's tuples
+        self.docs = []
+        self.postings = defaultdict(dict)  # token -> {doc: weight}
+
+        for p in playlists:
+            self._add(("playlist", p), ((p[2], TITLE_WEIGHT), (p[3], DESCRIPTION_WEIGHT)))
+        for v in videos:
+            self._add(("video", v), ((v[3], TITLE_WEIGHT),))
+
+        self.postings = dict(self.postings)
+        self.tokens = sorted(self.postings)
+
+    def _add(self, doc, fields):
+        doc_number = len(self.docs)
+        self.docs.append(doc)
+        for text, weight in fields:
+            for token in tokenize(text):
+                for term in index_terms(token):
+                    postings = self.postings[term]
+                    postings[doc_number] = max(postings.get(doc_number, 0.0), weight)
+
+    def _idf(self, postings):
+        return math.log(1 + len(self.docs) / len(postings))
+
+    def _exact(self, token):
+        """
+        ({doc: weight}, idf) for one query token; the postings aren't copied
+        """
+        postings = self.postings.get(token)
+        if not postings:
+            return {}, 0.0
+        return postings, self._idf(postings)
+
+    def _prefix(self, token):
+        """
+        ({doc: score}, 1.0) for the last query token: exact or prefix matches
+        """
+        exact, idf = self._exact(token)
+        scores = {doc: weight * idf for doc, weight in exact.items()}
+
+        i = bisect_left(self.tokens, token)
+        while i < len(self.tokens) and self.tokens[i].startswith(token):
+            candidate = self.tokens[i]
+            i += 1
+            if candidate == token:
+                continue
+            postings = self.postings[candidate]
+            idf = self._idf(postings) * PREFIX_FACTOR
+            for doc, weight in postings.items():
+                scores[doc] = max(scores.get(doc, 0.0), weight * idf)
+
+        return scores, 1.0
+
+    def search(self, query: str, kind: str = None, limit: int = 20):
+        """
+        The `limit` best (score, kind, row) tuples among the documents
+        matching every token, and how many matched in total
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+
+        # How much was typed decides on prefix matching, not the stem's length
+        *words, last = tokens
+        matches = [self._exact(query_term(t)) for t in words]
+        if len(last) >= MIN_PREFIX_LENGTH:
+            matches.append(self._prefix(query_term(last)))
+        else:
+            matches.append(self._exact(query_term(last)))
+
+        # Walk the most selective token's documents, look the rest up
+        matches.sort(key=lambda m: len(m[0]))
+        (smallest, smallest_factor), others = matches[0], matches[1:]
+
+        results = []
+        for doc, weight in smallest.items():
+            doc_kind, row = self.docs[doc]
+            if kind is not None and doc_kind != kind:
+                continue
+            score = weight * smallest_factor
+            for postings, factor in others:
+                other = postings.get(doc)
+                if other is None:
+                    break
+                score += other * factor
+            else:
+                results.append((round(score, 4), doc_kind, row))
+
+        # Best score first, then lowest id for a stable order
+        top = heapq.nsmallest(limit, results, key=lambda r: (-r[0], r[2][0]))
+        return top, len(results)
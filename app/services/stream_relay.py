@@ -0,0 +1,226 @@
+import httpx
+from app.config import settings
+from app.metrics import registry
+from app.services.url_cache import url_cache
+from app.services.downloader import resolve_audio_url, refresh_video_links
+
+# Upstream answers that mean "this URL is no good any more": expired,
+# bound to another IP, or gone
+STALE_URL_STATUSES = {403, 404, 410}
+
+# Response headers of the upstream stream that the browser needs
+PASSTHROUGH_HEADERS = ("content-type", "content-length", "content-range", "accept-ranges")
+
+
+class TooManyStreams(Exception):
+    """Raised when a client (or the whole worker) already has its maximum of open streams"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many concurrent streams")
+        self.retry_after = retry_after
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when no working stream URL could be obtained"""
+
+
+class StreamSlots:
+    """
+    Concurrent stream accounting: at most `per_client` open streams per
+    client address and `total` per worker. Every open stream holds one
+    upstream connection and one chunk in flight, so this bounds memory.
+    """
+
+    def __init__(self, per_client: int, total: int, retry_after: int):
+        self.per_client = per_client
+        self.total = total
+        self.retry_after = retry_after
+        self.active = 0
+        self.rejected = 0
+        self._by_client = {}
+
+    def acquire(self, client: str):
+        if self.active >= self.total or self._by_client.get(client, 0) >= self.per_client:
+            self.rejected += 1
+            raise TooManyStreams(self.retry_after)
+        self.active += 1
+        self._by_client[client] = self._by_client.get(client, 0) + 1
+
+    def release(self, client: str):
+        self.active -= 1
+        remaining = self._by_client.get(client, 1) - 1
+        if remaining:
+            self._by_client[client] = remaining
+        else:
+            self._by_client.pop(client, None)
+
+
+class RelayedStream:
+    """
+    One listener's relayed stream. body() yields upstream chunks and
+    reconnects at the current offset if the upstream connection fails.
+    close() releases the stream slot and the upstream connection; it's
+    idempotent, so the response calls it however it ends, even if the
+    body was never iterated (client gone before the first chunk).
+    """
+
+    def __init__(self, relay: "StreamRelay", video_id: str, upstream: httpx.Response, client: str):
+        self.relay = relay
+        self.video_id = video_id
+        self.upstream = upstream
+        self.client = client
+        self.sent = 0
+        self._closed = False
+
+    async def body(self):
+        span = parse_content_range(self.upstream.headers.get("content-range"))
+        start, end = span if span else (0, None)
+
+        try:
+            while True:
+                try:
+                    async for chunk in self.upstream.aiter_raw():
+                        self.sent += len(chunk)
+                        yield chunk
+                    return
+                except (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError):
+                    if end is not None and start + self.sent > end:
+                        return
+                    await self.upstream.aclose()
+
+                    # Pick up where we were; `open` re-resolves if the URL went stale
+                    self.relay.resumes += 1
+                    self.upstream = await self.relay.open(
+                        self.video_id, f"bytes={start + self.sent}-{'' if end is None else end}"
+                    )
+                    if self.upstream.status_code != 206:
+                        # Range ignored: resuming would repeat bytes already sent
+                        return
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # Slot first: closing the upstream may be cancelled
+        self.relay.slots.release(self.client)
+        self.relay.bytes_relayed += self.sent
+        await self.upstream.aclose()
+
+
+def parse_content_range(value: str):
+    """
+    (start, end) from "bytes start-end/total", or None
+    """
+    if not value or not value.startswith("bytes "):
+        return None
+    span = value[6:].split("/")[0]
+    start, _, end = span.partition("-")
+    try:
+        return int(start), int(end)
+    except ValueError:
+        return None
+
+
+class StreamRelay:
+    """
+    Relays googlevideo audio through this server, for clients that can't
+    use the IP-bound URL themselves. One pooled httpx.AsyncClient; Range
+    headers pass through for seeking; chunks are forwarded exactly as read
+    from the socket (no re-chunking, one chunk buffered per stream, so
+    backpressure from slow listeners reaches upstream). A URL that turns
+    out stale (403 / expired) is re-resolved and the stream resumes at the
+    byte it stopped at, also when the upstream connection drops mid-way.
+    """
+
+    def __init__(self, max_connections: int, timeout: float, max_reresolves: int, slots: StreamSlots):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_reresolves = max_reresolves
+        self.slots = slots
+        self._client = None
+
+        self.bytes_relayed = 0
+        self.reresolves = 0
+        self.resumes = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=10),
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections // 4 or 1,
+                ),
+            )
+        return self._client
+
+    async def _send(self, url: str, range_header: str = None):
+        headers = {"Range": range_header} if range_header else {}
+        request = self.client.build_request("GET", url, headers=headers)
+        return await self.client.send(request, stream=True)
+
+    async def open(self, video_id: str, range_header: str = None, url: str = None):
+        """
+        Open the upstream stream, re-resolving stale URLs.
+        Returns the streaming httpx.Response (caller closes it).
+        """
+        url = url or await resolve_audio_url(video_id)
+        for attempt in range(self.max_reresolves + 1):
+            if url:
+                response = await self._send(url, range_header)
+                if response.status_code not in STALE_URL_STATUSES:
+                    return response
+                await response.aclose()
+
+            if attempt < self.max_reresolves:
+                self.reresolves += 1
+                await url_cache.invalidate(video_id)
+                url = (await refresh_video_links(video_id))[1]
+
+        raise UpstreamUnavailable(f"No working stream URL for {video_id}")
+
+    def relay(self, video_id: str, upstream: httpx.Response, client: str):
+        """
+        The RelayedStream for an opened upstream response and the client's
+        stream slot; it owns both from here on
+        """
+        return RelayedStream(self, video_id, upstream, client)
+
+    def stats(self):
+        return {
+            "active_streams": self.slots.active,
+            "rejected_streams": self.slots.rejected,
+            "bytes_relayed": self.bytes_relayed,
+            "reresolves": self.reresolves,
+            "resumes": self.resumes,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global relay used by /videos/{id}/stream
+stream_relay = StreamRelay(
+    max_connections=settings.STREAM_MAX_STREAMS,
+    timeout=settings.STREAM_TIMEOUT,
+    max_reresolves=settings.STREAM_MAX_RERESOLVES,
+    slots=StreamSlots(
+        per_client=settings.STREAM_PER_CLIENT_LIMIT,
+        total=settings.STREAM_MAX_STREAMS,
+        retry_after=settings.STREAM_RETRY_AFTER,
+    ),
+)
+
+registry.gauge("stream_relay_active", "Audio streams currently relayed", callback=lambda: stream_relay.slots.active)
+registry.counter("stream_relay_rejected_total", "Streams refused by the concurrency limits",
+                 callback=lambda: stream_relay.slots.rejected)
+registry.counter("stream_relay_bytes_total", "Bytes relayed to listeners (finished streams)",
+                 callback=lambda: stream_relay.bytes_relayed)
+registry.counter("stream_relay_reresolves_total", "Stale stream URLs re-resolved",
+                 callback=lambda: stream_relay.reresolves)
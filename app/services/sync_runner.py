@@ -0,0 +1,184 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, text, update
+from app.config import settings
+from app.db.models import SyncRun
+from app.db.session import engine, AsyncSessionLocal as async_session
+from app.services.youtube_sync import sync_playlists_and_videos
+
+# pg advisory lock key shared by every process / host running this app
+SYNC_LOCK_KEY = 7_361_902_114
+
+HOST = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SyncJob:
+    def __init__(self, trigger: str, warm: bool = None):
+        self.job_id = uuid.uuid4().hex
+        self.trigger = trigger
+        self.warm = warm
+        self.status = "queued"
+        self.detail = None
+        self.task = None
+
+    def as_dict(self):
+        return {"job_id": self.job_id, "trigger": self.trigger, "status": self.status, "detail": self.detail}
+
+
+class SyncRunner:
+    """
+    Runs the sync with a single leader across workers and hosts.
+    A Postgres session-level advisory lock is held for the whole run, so
+    concurrent triggers on other processes are skipped, and within this
+    process a trigger while a run is active just returns that run.
+    Every job is recorded in `sync_runs` from the moment it's accepted
+    (queued, then running / completed / failed, or skipped), so any worker
+    can report its status.
+    """
+
+    def __init__(self):
+        self.current = None
+        self._lock = None
+
+    async def trigger(self, trigger: str, warm: bool = None) -> SyncJob:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # Held while the job is recorded, so concurrent triggers still share one job
+        async with self._lock:
+            if self.current and not self.current.task.done():
+                return self.current
+
+            job = SyncJob(trigger, warm)
+            try:
+                await self._record(job)
+            except Exception as e:
+                # The run fails the same way; its status stays in this worker's memory
+                print(f"⚠️ Could not record sync {job.job_id}: {e}")
+
+            job.task = asyncio.ensure_future(self._run(job))
+            self.current = job
+            return job
+
+    async def run_scheduled(self):
+        """
+        Scheduler job: same as a trigger, but waits for the run to finish
+        """
+        await (await self.trigger("scheduler")).task
+
+    async def _run(self, job: SyncJob):
+        try:
+            await self._run_as_leader(job)
+        except Exception as e:
+            # e.g. the database is unreachable: no lock, no sync_runs row
+            if job.status in ("queued", "running"):
+                job.status = "failed"
+                job.detail = str(e)
+            print(f"❌ Sync {job.job_id} failed: {e}")
+
+    async def _run_as_leader(self, job: SyncJob):
+        async with engine.connect() as conn:
+            locked = (await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": SYNC_LOCK_KEY}
+            )).scalar()
+            await conn.commit()
+
+            if not locked:
+                await self._skip(job, "Another worker is already syncing")
+                return
+
+            try:
+                if job.trigger == "scheduler" and await self._ran_recently():
+                    await self._skip(job, "A sync finished recently")
+                    return
+
+                job.status = "running"
+                await self._update(job, status="running", host=HOST, started_at=datetime.now(timezone.utc))
+
+                try:
+                    stats = await sync_playlists_and_videos(warm=job.warm)
+                except Exception as e:
+                    job.status = "failed"
+                    job.detail = str(e)
+                    print(f"❌ Sync {job.job_id} failed: {e}")
+                    await self._finish(job, error=str(e))
+                else:
+                    job.status = "completed"
+                    await self._finish(job, stats=stats)
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SYNC_LOCK_KEY})
+                await conn.commit()
+
+    async def _ran_recently(self):
+        since = datetime.now(timezone.utc) - timedelta(seconds=settings.SYNC_MIN_INTERVAL)
+        async with async_session() as db:
+            result = await db.execute(
+                select(SyncRun.id).where(
+                    SyncRun.status == "completed",
+                    SyncRun.finished_at > since
+                ).limit(1)
+            )
+            return result.scalar_one_or_none() is not None
+
+    async def _record(self, job: SyncJob):
+        async with async_session() as db:
+            db.add(SyncRun(
+                job_id=job.job_id,
+                trigger=job.trigger,
+                status=job.status,
+                host=HOST,
+                started_at=datetime.now(timezone.utc),
+            ))
+            await db.commit()
+
+    async def _update(self, job: SyncJob, **values):
+        async with async_session() as db:
+            await db.execute(update(SyncRun).where(SyncRun.job_id == job.job_id).values(**values))
+            await db.commit()
+
+    async def _skip(self, job: SyncJob, reason: str):
+        job.status = "skipped"
+        job.detail = reason
+        print(f"⏭ Sync {job.job_id} skipped: {reason}")
+        await self._update(job, status="skipped", error=reason, finished_at=datetime.now(timezone.utc))
+
+    async def _finish(self, job: SyncJob, stats: dict = None, error: str = None):
+        await self._update(
+            job,
+            status=job.status,
+            stats=stats,
+            error=error,
+            finished_at=datetime.now(timezone.utc),
+        )
+
+    async def status(self, job_id: str):
+        """
+        Status of a job from sync_runs (any worker), else this worker's memory
+        """
+        async with async_session() as db:
+            result = await db.execute(select(SyncRun).where(SyncRun.job_id == job_id))
+            run = result.scalar_one_or_none()
+
+        if run:
+            return {
+                "job_id": run.job_id,
+                "trigger": run.trigger,
+                "status": run.status,
+                "host": run.host,
+                "stats": run.stats,
+                "error": run.error,
+                "started_at": run.started_at,
+                "finished_at": run.finished_at,
+            }
+
+        if self.current and self.current.job_id == job_id:
+            return self.current.as_dict()
+
+        return None
+
+
+# Global runner used by the scheduler and the /sync routes
+sync_runner = SyncRunner()
@@ -0,0 +1,364 @@
+import asyncio
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+from app.config import settings
+from app.metrics import registry
+
+
+def parse_expiry(url: str):
+    """
+    Extract the unix `expire` timestamp from a googlevideo URL.
+    Handles both the query form (?expire=123) and the path form (/expire/123/)
+    """
+    if not url:
+        return None
+
+    try:
+        parsed = urlparse(url)
+        values = parse_qs(parsed.query).get("expire")
+        if values:
+            return int(values[0])
+
+        parts = parsed.path.split("/")
+        if "expire" in parts:
+            return int(parts[parts.index("expire") + 1])
+    except (ValueError, IndexError):
+        pass
+
+    return None
+
+
+class CacheBackend(ABC):
+    """
+    Storage behind URLCache: key -> (expires_at, value).
+    Backends own size bounds / eviction; expiry checks stay in URLCache.
+    Backends whose writes block on I/O set `blocking`, and URLCache writes
+    to them from a thread instead of the event loop.
+    """
+
+    blocking = False
+    evictions = 0
+
+    def init(self):
+        """Create storage (files, tables); called once at startup"""
+
+    @abstractmethod
+    def get(self, key: str):
+        """(expires_at, value) or None; counts as a use for LRU"""
+
+    @abstractmethod
+    def peek(self, key: str):
+        """Like get, but without touching LRU order"""
+
+    @abstractmethod
+    def set(self, key: str, expires_at: float, value):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def __len__(self):
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Per-process LRU dict: fastest, but neither shared nor persistent
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def peek(self, key: str):
+        return self._entries.get(key)
+
+    def set(self, key: str, expires_at: float, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Shared cache in a local SQLite file (WAL mode): every uvicorn worker on
+    the host reads and writes the same entries, and they survive restarts.
+    No external service needed. Values must be JSON-serializable; lists
+    come back as tuples.
+    Hits are read-only: LRU order is approximate, recorded in memory at
+    most once per `touch_interval` seconds per key and written with the
+    next set(), so cache hits never wait on another worker's write lock.
+    Writes may wait on one, up to the 5 s busy timeout.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, touch_interval: float = 60):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = None
+        self._touched = {}  # key -> accessed_at not written yet
+
+    def init(self):
+        with self._lock:
+            self._connect()
+
+    def _connect(self):
+        # Called with the lock held
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS url_cache ("
+                " key TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " value TEXT NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_url_cache_accessed_at ON url_cache (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _decode(row):
+        if row is None:
+            return None
+        value = json.loads(row[1])
+        return row[0], tuple(value) if isinstance(value, list) else value
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT expires_at, value, accessed_at FROM url_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[2] >= self.touch_interval:
+                self._touched[key] = now
+        return self._decode(row)
+
+    def peek(self, key: str):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT expires_at, value FROM url_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return self._decode(row)
+
+    def set(self, key: str, expires_at: float, value):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            self._flush_touched(conn)
+            conn.execute(
+                "INSERT INTO url_cache (key, expires_at, value, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET expires_at = excluded.expires_at, "
+                "value = excluded.value, accessed_at = excluded.accessed_at",
+                (key, expires_at, json.dumps(value), now),
+            )
+
+            # Trim every so often rather than on each write
+            self._writes += 1
+            if self._writes % 50 == 0:
+                self._trim(now)
+
+    def _flush_touched(self, conn):
+        if self._touched:
+            conn.executemany(
+                "UPDATE url_cache SET accessed_at = ? WHERE key = ? AND accessed_at < ?",
+                [(accessed_at, key, accessed_at) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _trim(self, now: float):
+        self._conn.execute("DELETE FROM url_cache WHERE expires_at <= ?", (now,))
+        excess = self._conn.execute("SELECT COUNT(*) FROM url_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM url_cache WHERE key IN "
+                "(SELECT key FROM url_cache ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def delete(self, key: str):
+        with self._lock:
+            self._touched.pop(key, None)
+            self._connect().execute("DELETE FROM url_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._connect().execute("DELETE FROM url_cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM url_cache").fetchone()[0]
+
+
+class URLCache:
+    """
+    Cache of resolved playback URLs keyed by YouTube video id.
+    Entries expire at the URL's own `expire=` timestamp minus a safety margin.
+    Backends store the URL's real expiry, so an entry inside its safety
+    margin is still available to get_stale() while re-resolving fails.
+    Storage and eviction are delegated to a CacheBackend; hit/miss counters
+    are per worker. Writes (set, invalidate) are coroutines so a blocking
+    backend runs them in a thread; reads stay synchronous.
+    """
+
+    def __init__(self, backend: CacheBackend, safety_margin: int, default_ttl: int):
+        self.backend = backend
+        self.safety_margin = safety_margin
+        self.default_ttl = default_ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def expiry_for(self, *urls):
+        """
+        Hard expiry (the earliest `expire=`) across the given URLs; an
+        entry stops being served by get() `safety_margin` seconds before it
+        """
+        now = time.time()
+        expiries = [e for e in (parse_expiry(u) for u in urls if u) if e]
+        if not expiries:
+            return now + self.default_ttl + self.safety_margin
+        return min(expiries)
+
+    def get(self, key: str):
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        now = time.time()
+        if expires_at - self.safety_margin <= now:
+            # Kept until really expired, as a stale fallback; blocking
+            # backends drop expired entries when they trim
+            if expires_at <= now and not self.backend.blocking:
+                self.backend.delete(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def get_stale(self, key: str, min_remaining: float = 0):
+        """
+        The value even inside its safety margin, as long as the URLs stay
+        valid for `min_remaining` more seconds; for when re-resolving isn't
+        possible. Doesn't count as a lookup.
+        """
+        entry = self.backend.peek(key)
+        if entry is None or entry[0] - time.time() <= min_remaining:
+            return None
+        self.stale_hits += 1
+        return entry[1]
+
+    async def _write(self, method, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def set(self, key: str, value, *urls):
+        """
+        Store a value; its expiry is derived from the given URLs
+        """
+        expires_at = self.expiry_for(*urls)
+        if expires_at - self.safety_margin <= time.time():
+            return
+
+        await self._write(self.backend.set, key, expires_at, value)
+
+    def ttl(self, key: str):
+        """
+        Seconds until the entry stops being served, or None if absent.
+        Doesn't count as a lookup and doesn't touch LRU order.
+        """
+        entry = self.backend.peek(key)
+        if entry is None:
+            return None
+        return entry[0] - self.safety_margin - time.time()
+
+    def init(self):
+        """Create the backend's storage; call once at startup, not at import"""
+        self.backend.init()
+
+    async def invalidate(self, key: str):
+        await self._write(self.backend.delete, key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": len(self.backend),
+            "max_entries": self.backend.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_backend(name: str) -> CacheBackend:
+    if name == "sqlite":
+        return SQLiteBackend(settings.URL_CACHE_SQLITE_PATH, settings.URL_CACHE_MAX_ENTRIES)
+    if name == "memory":
+        return MemoryBackend(settings.URL_CACHE_MAX_ENTRIES)
+    raise ValueError(f"Unknown URL_CACHE_BACKEND: {name!r} (expected 'memory' or 'sqlite')")
+
+
+# Global cache instance shared by all routes of this worker
+url_cache = URLCache(
+    backend=create_backend(settings.URL_CACHE_BACKEND),
+    safety_margin=settings.URL_CACHE_SAFETY_MARGIN,
+    default_ttl=settings.URL_CACHE_DEFAULT_TTL,
+)
+
+registry.counter("url_cache_hits_total", "URL cache hits", callback=lambda: url_cache.hits)
+registry.counter("url_cache_misses_total", "URL cache misses", callback=lambda: url_cache.misses)
+registry.counter("url_cache_evictions_total", "URL cache LRU evictions", callback=lambda: url_cache.backend.evictions)
+registry.gauge("url_cache_hit_ratio", "URL cache hits / lookups", callback=lambda: url_cache.stats()["hit_ratio"])
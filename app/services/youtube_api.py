@@ -0,0 +1,183 @@
+import httpx
+import asyncio
+import random
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from app.config import settings
+from app.metrics import youtube_api_calls
+
+# YouTube quota days roll over at midnight Pacific time
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+# Quota cost per call of the endpoints we use
+QUOTA_COST = {
+    "playlists": 1,
+    "playlistItems": 1,
+    "videos": 1,
+}
+
+# 403 reasons that are transient and worth retrying
+RETRYABLE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError"}
+
+
+class YouTubeAPIError(Exception):
+    def __init__(self, status: int, reason: str, message: str):
+        super().__init__(f"YouTube API {status} {reason}: {message}")
+        self.status = status
+        self.reason = reason
+
+
+class QuotaExhausted(YouTubeAPIError):
+    def __init__(self, message: str = "Daily quota budget exhausted"):
+        super().__init__(403, "quotaExceeded", message)
+
+
+class RateLimiter:
+    """
+    Quota-aware limiter: a token bucket caps requests per second, and a
+    per-day unit budget stops the sync before YouTube starts refusing us
+    """
+
+    def __init__(self, rate: float, burst: int, daily_quota: int):
+        self.rate = rate
+        self.burst = burst
+        self.daily_quota = daily_quota
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        self._quota_day = None
+        self.units_used = 0
+
+    def _charge_quota(self, units: int):
+        today = datetime.now(QUOTA_TZ).date()
+        if today != self._quota_day:
+            self._quota_day = today
+            self.units_used = 0
+
+        if self.units_used + units > self.daily_quota:
+            raise QuotaExhausted()
+        self.units_used += units
+
+    async def acquire(self, units: int = 1):
+        self._charge_quota(units)
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class YouTubeClient:
+    """
+    Minimal async client for the YouTube Data API v3 on a pooled
+    httpx.AsyncClient, with retries + exponential backoff on 403 rate
+    limits, 429 and 5xx, and support for conditional (ETag) requests
+    """
+
+    def __init__(self, api_key: str, base_url: str, max_connections: int, max_retries: int,
+                 timeout: float, limiter: RateLimiter):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.limiter = limiter
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def list(self, resource: str, etag: str = None, **params):
+        """
+        GET /{resource}; returns the decoded JSON, or None on 304 Not Modified
+        """
+        params = {k: v for k, v in params.items() if v is not None}
+        params["key"] = self.api_key
+        headers = {"If-None-Match": etag} if etag else {}
+
+        attempt = 0
+        while True:
+            await self.limiter.acquire(QUOTA_COST.get(resource, 1))
+
+            try:
+                response = await self.client.get(f"/{resource}", params=params, headers=headers)
+            except httpx.TransportError as e:
+                youtube_api_calls.inc(resource=resource, status="transport_error")
+                if attempt >= self.max_retries:
+                    raise YouTubeAPIError(0, "transport", str(e))
+            else:
+                youtube_api_calls.inc(resource=resource, status=response.status_code)
+                if response.status_code == 304:
+                    return None
+                if response.status_code < 400:
+                    return response.json()
+
+                error = self._parse_error(response)
+                if not self._should_retry(error) or attempt >= self.max_retries:
+                    raise error
+
+            attempt += 1
+            # Exponential backoff with full jitter: ~0.5s, 1s, 2s, ...
+            await asyncio.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+
+    @staticmethod
+    def _parse_error(response):
+        reason, message = "unknown", response.text[:200]
+        try:
+            error = response.json()["error"]
+            message = error.get("message", message)
+            reason = error.get("errors", [{}])[0].get("reason", reason)
+        except (ValueError, KeyError, IndexError, TypeError):
+            pass
+
+        if reason in ("quotaExceeded", "dailyLimitExceeded"):
+            return QuotaExhausted(message)
+        return YouTubeAPIError(response.status_code, reason, message)
+
+    @staticmethod
+    def _should_retry(error: YouTubeAPIError):
+        if isinstance(error, QuotaExhausted):
+            return False
+        if error.status == 403:
+            return error.reason in RETRYABLE_REASONS
+        return error.status == 429 or error.status >= 500
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global client used by the sync job
+youtube = YouTubeClient(
+    api_key=settings.YT_API_KEY,
+    base_url=settings.YOUTUBE_API_BASE_URL,
+    max_connections=settings.YOUTUBE_API_MAX_CONNECTIONS,
+    max_retries=settings.YOUTUBE_API_MAX_RETRIES,
+    timeout=settings.YOUTUBE_API_TIMEOUT,
+    limiter=RateLimiter(
+        rate=settings.YOUTUBE_API_RPS,
+        burst=settings.YOUTUBE_API_BURST,
+        daily_quota=settings.YOUTUBE_API_DAILY_QUOTA,
+    ),
+)
@@ -1,191 +1,335 @@
-from googleapiclient.discovery import build
 from sqlalchemy import select
-from app.db.models import Playlist, Video
+from app.db.models import Playlist, PlaylistSyncState
 from app.db.session import AsyncSessionLocal as async_session
-from app.services.downloader import get_video_links
+from app.db.upsert import upsert_playlists, upsert_videos, upsert_sync_state
+from app.services.prefetch import prefetcher
+from app.services.youtube_api import youtube
+from app.services.catalog import catalog_store
 from app.config import settings
+from app.metrics import sync_phase_duration
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 import isodate
 import asyncio
+import math
+import time
 
-# Initialize YouTube API client
-youtube = build("youtube", "v3", developerKey=settings.YT_API_KEY)
 
+@dataclass
+class SyncStats:
+    """Counters reported at the end of every sync run"""
+    api_calls: int = 0
+    api_seconds: float = 0.0
+    not_modified_pages: int = 0
+    skipped_playlists: int = 0
+    calls_saved: int = 0  # requests avoided or answered 304, playlistItems and videos alike
+    new_videos: int = 0
+    updated_videos: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
 
-async def sync_playlists_and_videos():
+    def record_call(self, seconds: float):
+        self.api_calls += 1
+        self.api_seconds += seconds
+
+    def as_dict(self):
+        avg_call = self.api_seconds / self.api_calls if self.api_calls else 0.0
+        return {
+            "api_calls": self.api_calls,
+            "not_modified_pages": self.not_modified_pages,
+            "skipped_playlists": self.skipped_playlists,
+            "calls_saved": self.calls_saved,
+            "seconds_saved": round(self.calls_saved * avg_call, 2),
+            "new_videos": self.new_videos,
+            "updated_videos": self.updated_videos,
+            "duration": round(time.perf_counter() - self.started_at, 2),
+        }
+
+
+async def execute(resource: str, stats: SyncStats, etag: str = None, **params):
+    """
+    Call a YouTube API list endpoint, optionally conditional on an ETag.
+    Returns None when the server answers 304 Not Modified.
+    """
+    start = time.perf_counter()
+    try:
+        return await youtube.list(resource, etag=etag, **params)
+    finally:
+        stats.record_call(time.perf_counter() - start)
+
+
+def is_unchanged(state, etag: str, item_count: int):
+    """
+    A playlist whose ETag and item count match the last complete sync
+    doesn't need its items fetched again
+    """
+    return (
+        state is not None
+        and state.pages is not None
+        and state.etag == etag
+        and state.item_count == item_count
+    )
+
+
+def is_stale(state, now: datetime):
+    """
+    Sync state older than SYNC_FULL_REFRESH_AGE isn't trusted: a changed
+    video title or thumbnail changes neither the playlist's ETag nor its
+    items pages', so every playlist gets a full pass that often
+    """
+    return state is not None and (
+        state.synced_at is None
+        or now - state.synced_at > timedelta(seconds=settings.SYNC_FULL_REFRESH_AGE)
+    )
+
+
+async def sync_playlists_and_videos(warm: bool = None):
     """
-    Sync all playlists & videos from YouTube channel with pagination
+    Sync all playlists & videos from YouTube channel with pagination.
+    Playlists unchanged since the last sync are skipped entirely and
+    unchanged playlistItems pages are short-circuited via If-None-Match,
+    unless their last full pass is older than SYNC_FULL_REFRESH_AGE.
+    All writes are bulk upserts: one statement for the playlists and one
+    transaction per playlist for its videos.
+    No yt-dlp work happens here; with `warm` (default SYNC_WARM_NEW_VIDEOS)
+    new video ids are handed to the background URL refresher.
     """
+    if warm is None:
+        warm = settings.SYNC_WARM_NEW_VIDEOS
+
     print("🔄 Starting YouTube sync...")
+    stats = SyncStats()
 
-    async with async_session() as db:
-        playlists = []
-        next_page_token = None
+    # ============================
+    # 1) FETCH ALL PLAYLISTS
+    # ============================
+    print("📋 Fetching playlists...")
+    playlist_items = []
+    next_page_token = None
 
-        # ============================
-        # 1) FETCH ALL PLAYLISTS
-        # ============================
-        print("📋 Fetching playlists...")
+    with sync_phase_duration.time(phase="fetch_playlists"):
         while True:
-            request = youtube.playlists().list(
+            playlists_data = await execute(
+                "playlists",
+                stats,
                 part="snippet,contentDetails",
                 channelId="UCx24U2X2rAIHEQylTCjSXgw",
                 maxResults=50,
                 pageToken=next_page_token
             )
-            playlists_data = request.execute()
-
-            for item in playlists_data.get("items", []):
-                playlist_yid = item["id"]
-                title = item["snippet"]["title"]
-                thumbnail = item["snippet"]["thumbnails"]["high"]["url"]
-
-                # Check if playlist exists
-                result = await db.execute(
-                    select(Playlist).where(Playlist.playlist_id == playlist_yid)
-                )
-                existing = result.scalar_one_or_none()
-
-                if not existing:
-                    playlist_obj = Playlist(
-                        playlist_id=playlist_yid,
-                        name=title,
-                        thumbnail=thumbnail
-                    )
-                    db.add(playlist_obj)
-                    await db.commit()
-                    await db.refresh(playlist_obj)
-                    print(f"🆕 Added playlist: {title}")
-                else:
-                    playlist_obj = existing
-                    print(f"✔ Playlist exists: {title}")
-
-                playlists.append(playlist_obj)
+            playlist_items.extend(playlists_data.get("items", []))
 
             # Check if there is a next page
             next_page_token = playlists_data.get("nextPageToken")
             if not next_page_token:
                 break
 
+    rows = [
+        {
+            "playlist_id": item["id"],
+            "name": item["snippet"]["title"],
+            "description": item["snippet"].get("description") or None,
+            "thumbnail": item["snippet"]["thumbnails"]["high"]["url"],
+        }
+        for item in playlist_items
+    ]
+
+    with sync_phase_duration.time(phase="upsert_playlists"):
+        async with async_session() as db:
+            # Sync state of every playlist seen before, in one query
+            result = await db.execute(select(PlaylistSyncState))
+            states = {s.playlist_id: s for s in result.scalars().all()}
+
+            # All playlists in one INSERT ... ON CONFLICT statement
+            ids = await upsert_playlists(db, rows)
+            await db.commit()
+    print(f"✔ Upserted {len(ids)} playlists")
+
+    playlists = []
+    now = datetime.now(timezone.utc)
+    for item, row in zip(playlist_items, rows):
+        item_etag = item.get("etag")
+        item_count = item.get("contentDetails", {}).get("itemCount")
+
+        state = states.get(row["playlist_id"])
+        if is_stale(state, now):
+            # Fetch every page and every video's details again
+            state = None
+        if is_unchanged(state, item_etag, item_count):
+            stats.skipped_playlists += 1
+            # Every playlistItems page, plus the videos.list call of each non-empty one
+            pages = math.ceil((item_count or 0) / 50)
+            stats.calls_saved += max(1, pages) + pages
+            continue
+
+        playlist_obj = Playlist(id=ids[row["playlist_id"]], **row)
+        playlists.append((playlist_obj, item_etag, item_count, state))
+
     # ============================
     # 2) FETCH VIDEOS WITH CONTROLLED CONCURRENCY
     # ============================
-    print(f"\n⚡ Fetching videos from {len(playlists)} playlists with concurrency...")
-    
-    # Process 10 playlists at a time (each gets its own DB session)
-    semaphore = asyncio.Semaphore(10)
-    
-    async def sync_with_limit(playlist):
+    print(
+        f"\n⚡ Fetching videos from {len(playlists)} changed playlists "
+        f"({stats.skipped_playlists} unchanged skipped) with concurrency..."
+    )
+
+    # Process SYNC_CONCURRENCY playlists at a time (each gets its own DB session);
+    # API calls are non-blocking so these really overlap
+    semaphore = asyncio.Semaphore(settings.SYNC_CONCURRENCY)
+
+    async def sync_with_limit(playlist, item_etag, item_count, state):
         async with semaphore:
             try:
-                await sync_videos_for_playlist(playlist)
+                await sync_videos_for_playlist(playlist, item_etag, item_count, state, stats, warm)
             except Exception as e:
                 print(f"❌ Error syncing playlist {playlist.name}: {e}")
-    
+
     # Process all playlists concurrently with the semaphore limit
-    await asyncio.gather(*[sync_with_limit(p) for p in playlists], return_exceptions=True)
+    with sync_phase_duration.time(phase="sync_videos"):
+        await asyncio.gather(*[sync_with_limit(*p) for p in playlists], return_exceptions=True)
+
+    # Swap in a fresh catalog snapshot if this sync changed anything
+    catalog = catalog_store.current
+    if (
+        catalog is None
+        or stats.new_videos
+        or stats.updated_videos
+        or catalog.playlists_differ(rows)
+    ):
+        try:
+            with sync_phase_duration.time(phase="catalog_reload"):
+                await catalog_store.load()
+        except Exception as e:
+            print(f"⚠️ Could not reload catalog: {e}")
 
-    print("\n✅ Sync finished.")
+    report = stats.as_dict()
+    print(
+        f"\n✅ Sync finished in {report['duration']}s: {report['api_calls']} API calls, "
+        f"{report['calls_saved']} calls (~{report['seconds_saved']}s) saved, "
+        f"{report['not_modified_pages']} pages not modified."
+    )
+    return report
 
 
 # =====================================================
 # Helper function to fetch videos inside playlist
 # =====================================================
-async def sync_videos_for_playlist(playlist_obj):
-    """Fetch videos for a single playlist with its own database session"""
-    # Each playlist gets its own session to avoid conflicts
-    async with async_session() as db:
-        print(f" ▶ Fetching videos for playlist: {playlist_obj.name}")
+async def sync_videos_for_playlist(playlist_obj, item_etag=None, item_count=None, state=None, stats=None,
+                                   warm=False):
+    """
+    Fetch videos for a single playlist, then write them all (and the
+    playlist's sync state) in a single transaction of its own
+    """
+    stats = stats or SyncStats()
+    old_pages = (state.pages if state else None) or []
+    print(f" ▶ Fetching videos for playlist: {playlist_obj.name}")
 
-        next_page_token = None
-        video_count = 0
+    next_page_token = None
+    pages = []
+    details = []  # videos.list calls run while we keep paging
+    complete = True
 
-        while True:
-            try:
-                request = youtube.playlistItems().list(
-                    part="snippet,contentDetails",
-                    playlistId=playlist_obj.playlist_id,
-                    maxResults=50,
-                    pageToken=next_page_token
-                )
-                videos_data = request.execute()
-
-                # Collect all video IDs from this page
-                video_ids_to_process = []
-                
-                for item in videos_data.get("items", []):
-                    video_id = item["contentDetails"]["videoId"]
-                    video_ids_to_process.append(video_id)
-
-                # Batch check which videos already exist
-                if video_ids_to_process:
-                    result = await db.execute(
-                        select(Video.video_id).where(Video.video_id.in_(video_ids_to_process))
-                    )
-                    existing_video_ids = {row[0] for row in result.fetchall()}
-                    
-                    # Filter out existing videos
-                    new_video_ids = [vid for vid in video_ids_to_process if vid not in existing_video_ids]
-                    
-                    # Fetch details for all new videos in batch (YouTube allows up to 50 IDs)
-                    if new_video_ids:
-                        for i in range(0, len(new_video_ids), 50):
-                            batch = new_video_ids[i:i+50]
-                            
-                            try:
-                                video_req = youtube.videos().list(
-                                    part="snippet,contentDetails",
-                                    id=",".join(batch)
-                                ).execute()
-
-                                videos_to_add = []
-                                for v in video_req.get("items", []):
-                                    try:
-                                        video_id = v["id"]
-                                        title = v["snippet"]["title"]
-                                        thumbnail = v["snippet"]["thumbnails"]["high"]["url"]
-                                        duration_iso = v["contentDetails"]["duration"]
-                                        duration_sec = parse_duration(duration_iso)
-
-                                        # Generate download URLs
-                                        mp4_link, mp3_link = get_video_links(video_id)
-
-                                        new_video = Video(
-                                            video_id=video_id,
-                                            playlist_id=playlist_obj.id,
-                                            title=title,
-                                            thumbnail=thumbnail,
-                                            duration=duration_sec,
-                                            
-                                        )
-
-                                        videos_to_add.append(new_video)
-                                        video_count += 1
-                                    
-                                    except Exception as e:
-                                        print(f"   ⚠ Error processing video: {e}")
-                                        continue
-                                
-                                # Bulk add videos
-                                if videos_to_add:
-                                    db.add_all(videos_to_add)
-                                    await db.commit()
-                                    print(f"   ✓ Added {len(videos_to_add)} videos")
-                            
-                            except Exception as e:
-                                print(f"   ❌ Error fetching video batch: {e}")
-                                await db.rollback()
-                                continue
-
-                # Pagination for videos
-                next_page_token = videos_data.get("nextPageToken")
+    while True:
+        try:
+            # Reuse the stored page ETag only if we reached this page
+            # through the same token as last time
+            page_index = len(pages)
+            old_page = old_pages[page_index] if page_index < len(old_pages) else None
+            previous_token = old_pages[page_index - 1]["next"] if page_index > 0 and old_page else None
+            page_etag = old_page["etag"] if old_page and previous_token == next_page_token else None
+
+            videos_data = await execute(
+                "playlistItems",
+                stats,
+                etag=page_etag,
+                part="snippet,contentDetails",
+                playlistId=playlist_obj.playlist_id,
+                maxResults=50,
+                pageToken=next_page_token
+            )
+
+            if videos_data is None:
+                # 304: this page is exactly what we stored last time, so its
+                # videos.list call isn't needed either
+                stats.not_modified_pages += 1
+                stats.calls_saved += 2
+                pages.append(old_page)
+                next_page_token = old_page["next"]
                 if not next_page_token:
                     break
-            
-            except Exception as e:
-                print(f"   ❌ Error fetching playlist items: {e}")
+                continue
+
+            pages.append({
+                "etag": videos_data.get("etag"),
+                "next": videos_data.get("nextPageToken"),
+            })
+
+            # Details of every video on the page (max 50 = one videos.list call),
+            # so changed titles / thumbnails get refreshed too
+            video_ids = [item["contentDetails"]["videoId"] for item in videos_data.get("items", [])]
+            if video_ids:
+                details.append(asyncio.ensure_future(
+                    execute("videos", stats, part="snippet,contentDetails", id=",".join(video_ids))
+                ))
+
+            # Pagination for videos
+            next_page_token = videos_data.get("nextPageToken")
+            if not next_page_token:
                 break
 
-        print(f"   ✅ Completed {playlist_obj.name}: {video_count} new videos")
+        except Exception as e:
+            print(f"   ❌ Error fetching playlist items: {e}")
+            complete = False
+            break
+
+    rows = []
+    published = {}  # video id -> snippet.publishedAt (ISO 8601, sorts by time)
+    for video_req in await asyncio.gather(*details, return_exceptions=True):
+        if isinstance(video_req, Exception):
+            print(f"   ❌ Error fetching video batch: {video_req}")
+            complete = False
+            continue
+
+        for v in video_req.get("items", []):
+            try:
+                rows.append({
+                    "video_id": v["id"],
+                    "playlist_id": playlist_obj.id,
+                    "title": v["snippet"]["title"],
+                    "thumbnail": v["snippet"]["thumbnails"]["high"]["url"],
+                    "duration": parse_duration(v["contentDetails"]["duration"]),
+                })
+                published[v["id"]] = v["snippet"].get("publishedAt") or ""
+            except Exception as e:
+                print(f"   ⚠ Error processing video: {e}")
+                continue
+
+    async with async_session() as db:
+        try:
+            inserted, updated = await upsert_videos(db, rows)
+
+            # Only remember the state of a complete pass, so failures get retried
+            if complete:
+                await upsert_sync_state(db, {
+                    "playlist_id": playlist_obj.playlist_id,
+                    "etag": item_etag,
+                    "item_count": item_count,
+                    "pages": pages,
+                    "synced_at": datetime.now(timezone.utc),
+                })
+
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    # Sync is metadata-only: playback URLs are resolved on demand, or
+    # deferred to the rate-limited background refresher when warming is on
+    if inserted and warm:
+        await prefetcher.warm((video_id, published.get(video_id, "")) for video_id in inserted)
+
+    stats.new_videos += len(inserted)
+    stats.updated_videos += len(updated)
+    print(f"   ✅ Completed {playlist_obj.name}: {len(inserted)} new, {len(updated)} updated videos")
 
 
 # =====================================================
@@ -197,4 +341,4 @@ def parse_duration(duration_str: str) -> int:
         duration = isodate.parse_duration(duration_str)
         return int(duration.total_seconds())
     except:
-        return 0
\ No newline at end of file
+        return 0
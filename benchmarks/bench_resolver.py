@@ -0,0 +1,63 @@
+"""
+Playback URL resolution around yt-dlp: format picking, the URL cache and
+the single-flight / pool path. yt-dlp itself is FakeYoutubeDL with no
+delay, so these measure our own overhead.
+"""
+import asyncio
+import time
+from benchmarks.fake_youtube import install_fake_ytdlp
+from app.services import downloader
+from app.services.url_cache import URLCache, MemoryBackend, SQLiteBackend, parse_expiry
+
+install_fake_ytdlp()
+
+EXPIRE = int(time.time()) + 6 * 3600
+URL = f"https://rr3---sn-4g5e6nz7.googlevideo.com/videoplayback?expire={EXPIRE}&ei=abc&ip=1.2.3.4&id=o-AB&itag=140"
+
+
+def _formats():
+    # Roughly what yt-dlp returns for a lesson: storyboards, DASH audio /
+    # video and a progressive mp4, sorted worst -> best
+    formats = [{"format_id": f"sb{i}", "ext": "mhtml", "acodec": "none", "vcodec": "none", "url": URL} for i in range(3)]
+    formats += [{"format_id": str(i), "ext": "webm", "acodec": "opus", "vcodec": "none", "url": URL} for i in range(4)]
+    formats += [{"format_id": str(100 + i), "ext": "mp4", "acodec": "none", "vcodec": "avc1", "url": URL} for i in range(15)]
+    formats += [{"format_id": "18", "ext": "mp4", "acodec": "mp4a.40.2", "vcodec": "avc1.42001E", "url": URL}]
+    return formats
+
+
+def bench_pick_formats(benchmark):
+    formats = _formats()
+    benchmark(lambda: (downloader._pick_video(formats), downloader._pick_audio(formats)))
+
+
+def bench_parse_expiry(benchmark):
+    assert benchmark(parse_expiry, URL) == EXPIRE
+
+
+def bench_memory_cache_hit(benchmark):
+    cache = URLCache(MemoryBackend(5000), safety_margin=600, default_ttl=1800)
+    cache.set("video", (URL, URL), URL)
+    benchmark(cache.get, "video")
+
+
+def bench_sqlite_cache_hit(benchmark, tmp_path):
+    cache = URLCache(SQLiteBackend(str(tmp_path / "cache.sqlite3"), 5000), safety_margin=600, default_ttl=1800)
+    cache.set("video", (URL, URL), URL)
+    benchmark(cache.get, "video")
+
+
+def bench_resolve_cached(benchmark, run):
+    downloader.url_cache.set("cachedvideo", (URL, URL), URL)
+    benchmark(run, lambda: downloader.resolve_video_links("cachedvideo"))
+
+
+def bench_resolve_misses_concurrently(benchmark, dataset, run):
+    """A pool's worth of distinct cold videos, each requested by 4 clients at once"""
+    pool = downloader.extraction_pool
+    video_ids = [row[1] for row in dataset.video_rows()[:pool.max_workers + pool.max_queue]]
+
+    async def burst():
+        downloader.url_cache.clear()
+        await asyncio.gather(*[downloader.resolve_video_links(v) for v in video_ids * 4])
+
+    benchmark.pedantic(run, args=(burst,), rounds=10, iterations=1)
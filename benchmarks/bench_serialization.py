@@ -0,0 +1,54 @@
+"""
+Catalog snapshot building and response encoding: the per-request cost of
+the read routes once the catalog is warm
+"""
+from app.api.encoded import EncodedEntry
+from app.api.videos import VideoWithLinksResponse
+from app.services.catalog import Catalog
+
+
+def bench_catalog_build(benchmark, dataset):
+    playlists, videos = dataset.playlist_rows(), dataset.video_rows()
+    benchmark.pedantic(Catalog, args=(playlists, videos), rounds=5, iterations=1)
+
+
+def bench_page_playlists(benchmark, catalog):
+    benchmark(catalog.page_playlists, 100, 200)
+
+
+def bench_page_videos_all_fields(benchmark, catalog):
+    benchmark(catalog.page_videos, 1, 500)
+
+
+def bench_page_videos_selected_fields(benchmark, catalog):
+    benchmark(catalog.page_videos, 1, 500, None, ["id", "title"])
+
+
+def bench_encode_playlists_page(benchmark, catalog):
+    rows, next_cursor = catalog.page_playlists(100)
+    benchmark(EncodedEntry, rows, next_cursor)
+
+
+def bench_encode_videos_page(benchmark, catalog):
+    rows, next_cursor = catalog.page_videos(1, 500)
+    benchmark(EncodedEntry, rows, next_cursor)
+
+
+def bench_play_response_model(benchmark, catalog):
+    video = catalog.video(1)
+    url = "https://rr1---sn.googlevideo.com/videoplayback?expire=1900000000&itag=140&id=o-abc"
+
+    def build():
+        return VideoWithLinksResponse(**video, mp4_url=url, mp3_url=url).model_dump_json()
+
+    benchmark(build)
+
+
+def bench_search(benchmark, catalog):
+    from benchmarks.dataset import SEARCH_QUERIES
+
+    def search_all():
+        for query in SEARCH_QUERIES:
+            catalog.search(query, 20)
+
+    benchmark(search_all)
@@ -0,0 +1,39 @@
+"""
+Cold start: importing the app in a fresh interpreter, which is what every
+worker (re)start pays before it can serve. Fails when the import takes
+longer than BENCH_IMPORT_BUDGET seconds (default 1.0) or pulls in modules
+that should only load on first use.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET = float(os.getenv("BENCH_IMPORT_BUDGET", "1.0"))
+
+# Loaded lazily by the app; importing any of them at startup is a regression
+LAZY_MODULES = ["yt_dlp", "psycopg2", "googleapiclient"]
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _import_app():
+    # The env from conftest (placeholder DATABASE_URL etc.) is inherited
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_import_app(benchmark):
+    probes = []
+    benchmark.pedantic(lambda: probes.append(_import_app()), rounds=5, iterations=1)
+
+    fastest = min(p["seconds"] for p in probes)
+    assert fastest < IMPORT_BUDGET, f"importing the app took {fastest:.2f}s (budget {IMPORT_BUDGET:.2f}s)"
+    assert not probes[0]["loaded"], f"imported at startup: {', '.join(probes[0]['loaded'])}"
@@ -0,0 +1,62 @@
+"""
+Sync diffing: deciding what changed and building the upsert statements.
+The DB round-trips are left out; statements are compiled but not sent.
+"""
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from app.db.upsert import upsert_videos, _dedupe
+from app.services.youtube_sync import is_unchanged, parse_duration
+
+
+class CompileOnlySession:
+    """Stands in for AsyncSession: compiles each statement, returns no rows"""
+
+    dialect = postgresql.dialect()
+
+    async def execute(self, stmt):
+        stmt.compile(dialect=self.dialect)
+        return []
+
+
+def _states(dataset):
+    return {
+        p["id"]: SimpleNamespace(etag=f"etag-{p['id']}", item_count=dataset.videos_per_playlist, pages=[{}])
+        for p in dataset.playlists
+    }
+
+
+def bench_is_unchanged(benchmark, dataset):
+    states = _states(dataset)
+    items = [(p["id"], f"etag-{p['id']}", dataset.videos_per_playlist) for p in dataset.playlists]
+
+    def diff():
+        return [pid for pid, etag, count in items if not is_unchanged(states.get(pid), etag, count)]
+
+    assert benchmark(diff) == []
+
+
+def bench_playlists_differ(benchmark, dataset, catalog):
+    rows = [
+        {"playlist_id": row[1], "name": row[2], "description": row[3], "thumbnail": row[4]}
+        for row in dataset.playlist_rows()
+    ]
+    assert benchmark(catalog.playlists_differ, rows) is False
+
+
+def bench_parse_durations(benchmark, dataset):
+    durations = [f"PT{v['duration'] // 60}M{v['duration'] % 60}S" for v in dataset.videos[dataset.playlists[0]["id"]]]
+    benchmark(lambda: [parse_duration(d) for d in durations])
+
+
+def bench_dedupe_videos(benchmark, dataset):
+    rows = [dict(zip(("id", "video_id"), row[:2])) for row in dataset.video_rows()]
+    benchmark(_dedupe, rows + rows[:1000], "video_id")
+
+
+def bench_upsert_videos_statement(benchmark, dataset, run):
+    rows = [
+        {"video_id": v[1], "playlist_id": v[2], "title": v[3], "thumbnail": v[4], "duration": v[5]}
+        for v in dataset.video_rows()[:1000]
+    ]
+    session = CompileOnlySession()
+    benchmark(run, lambda: upsert_videos(session, rows))
@@ -0,0 +1,90 @@
+import os
+import random
+import string
+
+# Vocabulary for titles: common lesson topics plus a few filler words, so
+# search queries hit realistic posting list sizes
+TOPICS = [
+    "الصلاة", "الزكاة", "الصيام",
+    "الحج", "التوحيد", "الفقه",
+    "السيرة", "التفسير", "الحديث",
+    "العقيدة", "الأخلاق", "الطهارة",
+    "البيوع", "النكاح", "الميراث",
+    "الجنائز", "الدعاء", "الذكر",
+    "القرآن", "السنة",
+]
+FILLER = [
+    "شرح", "درس", "باب",
+    "كتاب", "مجلس",
+]
+
+# Search queries used by the Locust scenario and the micro-benchmarks:
+# whole words, article-less stems and prefixes a user is still typing
+SEARCH_QUERIES = TOPICS + [t[2:] for t in TOPICS] + [t[:4] for t in TOPICS] + FILLER
+
+
+def _youtube_id(rng: random.Random, length: int, prefix: str = ""):
+    alphabet = string.ascii_letters + string.digits + "-_"
+    return prefix + "".join(rng.choice(alphabet) for _ in range(length))
+
+
+class Dataset:
+    """
+    Deterministic fake channel: the same (playlists, videos_per_playlist,
+    seed) always yields the same ids, titles and durations, so the fake
+    YouTube API, the DB fixtures and the Locust scenarios agree on one
+    catalog without sharing state.
+    """
+
+    def __init__(self, playlists: int = None, videos_per_playlist: int = None, seed: int = None):
+        self.playlist_count = playlists or int(os.getenv("BENCH_PLAYLISTS", "500"))
+        self.videos_per_playlist = videos_per_playlist or int(os.getenv("BENCH_VIDEOS_PER_PLAYLIST", "40"))
+        self.seed = seed if seed is not None else int(os.getenv("BENCH_SEED", "42"))
+
+        rng = random.Random(self.seed)
+        self.playlists = []  # YouTube-shaped dicts, in channel order
+        self.videos = {}  # YouTube playlist id -> [video dicts]
+
+        for p in range(self.playlist_count):
+            playlist_id = _youtube_id(rng, 32, "PL")
+            topic = rng.choice(TOPICS)
+            self.playlists.append({
+                "id": playlist_id,
+                "title": f"{rng.choice(FILLER)} {topic} {p + 1}",
+                "description": f"{rng.choice(FILLER)} {topic} {rng.choice(TOPICS)}" if rng.random() < 0.7 else "",
+                "thumbnail": f"https://i.ytimg.com/vi/{playlist_id}/hqdefault.jpg",
+            })
+
+            videos = []
+            for v in range(self.videos_per_playlist):
+                video_id = _youtube_id(rng, 11)
+                videos.append({
+                    "id": video_id,
+                    "title": f"{topic} - {rng.choice(FILLER)} {rng.choice(TOPICS)} {v + 1}",
+                    "duration": rng.randint(300, 7200),
+                    "thumbnail": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+                })
+            self.videos[playlist_id] = videos
+
+    def all_videos(self):
+        for playlist in self.playlists:
+            yield playlist, self.videos[playlist["id"]]
+
+    def playlist_rows(self):
+        """
+        Catalog tuples (see app.services.catalog.PLAYLIST_FIELDS), ids from 1
+        """
+        return [
+            (i, p["id"], p["title"], p["description"] or None, p["thumbnail"])
+            for i, p in enumerate(self.playlists, start=1)
+        ]
+
+    def video_rows(self):
+        """
+        Catalog tuples (see app.services.catalog.VIDEO_FIELDS), ids from 1
+        """
+        rows = []
+        for playlist_number, (playlist, videos) in enumerate(self.all_videos(), start=1):
+            for v in videos:
+                rows.append((len(rows) + 1, v["id"], playlist_number, v["title"], v["thumbnail"], v["duration"]))
+        return rows
@@ -0,0 +1,232 @@
+"""
+Local stand-in for YouTube: the Data API v3 endpoints the sync uses, a
+googlevideo-like /videoplayback stream, and a drop-in YoutubeDL whose
+extract_info returns URLs pointing at that stream. Latency and failure
+rates are configurable, so load tests are reproducible and run offline.
+
+    python -m benchmarks.fake_youtube              # API + stream on :8090
+
+Settings (environment):
+    FAKE_API_LATENCY_MS / FAKE_API_JITTER_MS     Data API response delay
+    FAKE_API_FAILURE_RATE                        share of 403 rateLimitExceeded / 500 answers
+    FAKE_YTDLP_LATENCY_MS / FAKE_YTDLP_JITTER_MS extract_info delay
+    FAKE_YTDLP_FAILURE_RATE                      share of extract_info errors
+    FAKE_URL_TTL                                 lifetime of resolved URLs (expire=)
+    FAKE_STREAM_BYTES                            size of each fake audio / video stream
+    FAKE_YOUTUBE_URL                             where the stream is served (for URLs)
+    BENCH_PLAYLISTS / BENCH_VIDEOS_PER_PLAYLIST / BENCH_SEED   the catalog (see dataset.py)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from fastapi import FastAPI, Request, Response
+from benchmarks.dataset import Dataset
+
+PAGE_SIZE = 50
+CHUNK_SIZE = 64 * 1024
+
+
+class FakeConfig:
+    def __init__(self):
+        self.api_latency = float(os.getenv("FAKE_API_LATENCY_MS", "80")) / 1000
+        self.api_jitter = float(os.getenv("FAKE_API_JITTER_MS", "40")) / 1000
+        self.api_failure_rate = float(os.getenv("FAKE_API_FAILURE_RATE", "0"))
+        self.ytdlp_latency = float(os.getenv("FAKE_YTDLP_LATENCY_MS", "1500")) / 1000
+        self.ytdlp_jitter = float(os.getenv("FAKE_YTDLP_JITTER_MS", "500")) / 1000
+        self.ytdlp_failure_rate = float(os.getenv("FAKE_YTDLP_FAILURE_RATE", "0.02"))
+        self.url_ttl = int(os.getenv("FAKE_URL_TTL", "21600"))
+        self.stream_bytes = int(os.getenv("FAKE_STREAM_BYTES", str(4 * 1024 * 1024)))
+        self.base_url = os.getenv("FAKE_YOUTUBE_URL", "http://127.0.0.1:8090")
+
+    def delay(self, mean: float, jitter: float):
+        return max(0.0, random.uniform(mean - jitter, mean + jitter))
+
+
+config = FakeConfig()
+dataset = Dataset()
+
+
+# ============================
+# yt-dlp stand-in
+# ============================
+class FakeDownloadError(Exception):
+    pass
+
+
+class FakeYoutubeDL:
+    """
+    Same surface as the yt_dlp.YoutubeDL calls in app.services.downloader.
+    extract_info blocks (it runs on the extraction pool threads, like the
+    real one) and returns one audio-only and one progressive mp4 format.
+    """
+
+    def __init__(self, opts=None):
+        self.opts = opts or {}
+
+    def extract_info(self, url: str, download: bool = False):
+        time.sleep(config.delay(config.ytdlp_latency, config.ytdlp_jitter))
+        if random.random() < config.ytdlp_failure_rate:
+            raise FakeDownloadError(f"ERROR: [youtube] {url}: Sign in to confirm you're not a bot")
+
+        video_id = url.rsplit("v=", 1)[-1]
+        expire = int(time.time()) + config.url_ttl
+        stream = f"{config.base_url}/videoplayback/{video_id}?expire={expire}"
+        return {
+            "id": video_id,
+            "formats": [
+                {"format_id": "140", "ext": "m4a", "acodec": "mp4a.40.2", "vcodec": "none",
+                 "url": f"{stream}&itag=140"},
+                {"format_id": "18", "ext": "mp4", "acodec": "mp4a.40.2", "vcodec": "avc1.42001E",
+                 "url": f"{stream}&itag=18"},
+            ],
+        }
+
+
+def install_fake_ytdlp():
+    """
+    Make the app's downloader build FakeYoutubeDL instances instead of real ones
+    """
+    from app.services import downloader
+    downloader.YoutubeDL = FakeYoutubeDL
+
+
+# ============================
+# Data API v3 stand-in
+# ============================
+app = FastAPI(title="Fake YouTube")
+
+_playlists_by_id = {p["id"]: p for p in dataset.playlists}
+_videos_by_id = {v["id"]: v for _, videos in dataset.all_videos() for v in videos}
+
+
+def _error(status: int, reason: str):
+    body = {"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}
+    return Response(json.dumps(body), status_code=status, media_type="application/json")
+
+
+def _page(items: list, page_token: str | None, max_results: int):
+    start = int(page_token or 0)
+    page = items[start:start + max_results]
+    next_token = str(start + max_results) if start + max_results < len(items) else None
+    return page, next_token
+
+
+async def _respond(request: Request, payload: dict):
+    await asyncio.sleep(config.delay(config.api_latency, config.api_jitter))
+
+    roll = random.random()
+    if roll < config.api_failure_rate:
+        return _error(403, "rateLimitExceeded") if roll < config.api_failure_rate / 2 else _error(500, "backendError")
+
+    body = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:20] + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    payload["etag"] = etag
+    return Response(json.dumps(payload, ensure_ascii=False), media_type="application/json", headers={"ETag": etag})
+
+
+def _item_etag(obj: dict):
+    return hashlib.sha1(json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+
+@app.get("/playlists")
+async def playlists(request: Request, channelId: str = None, maxResults: int = PAGE_SIZE, pageToken: str = None):
+    page, next_token = _page(dataset.playlists, pageToken, maxResults)
+    items = [
+        {
+            "id": p["id"],
+            "etag": _item_etag(p) + str(len(dataset.videos[p["id"]])),
+            "snippet": {
+                "title": p["title"],
+                "description": p["description"],
+                "thumbnails": {"high": {"url": p["thumbnail"]}},
+            },
+            "contentDetails": {"itemCount": len(dataset.videos[p["id"]])},
+        }
+        for p in page
+    ]
+    return await _respond(request, {"items": items, "nextPageToken": next_token})
+
+
+@app.get("/playlistItems")
+async def playlist_items(request: Request, playlistId: str, maxResults: int = PAGE_SIZE, pageToken: str = None):
+    if playlistId not in _playlists_by_id:
+        return _error(404, "playlistNotFound")
+
+    page, next_token = _page(dataset.videos[playlistId], pageToken, maxResults)
+    items = [
+        {
+            "snippet": {
+                "title": v["title"],
+                "resourceId": {"videoId": v["id"]},
+                "thumbnails": {"high": {"url": v["thumbnail"]}},
+            },
+            "contentDetails": {"videoId": v["id"]},
+        }
+        for v in page
+    ]
+    return await _respond(request, {"items": items, "nextPageToken": next_token})
+
+
+@app.get("/videos")
+async def videos(request: Request, id: str = ""):
+    items = [
+        {
+            "id": v["id"],
+            "snippet": {"title": v["title"], "thumbnails": {"high": {"url": v["thumbnail"]}}},
+            "contentDetails": {"duration": f"PT{v['duration']}S"},
+        }
+        for v in (_videos_by_id.get(vid) for vid in id.split(",")) if v
+    ]
+    return await _respond(request, {"items": items})
+
+
+# ============================
+# googlevideo stand-in
+# ============================
+def _parse_range(header: str, size: int):
+    """
+    (start, end) inclusive for a single "bytes=a-b" range, or None
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    first = header[6:].split(",")[0].strip()
+    start, _, end = first.partition("-")
+    if not start:
+        return max(0, size - int(end)), size - 1
+    return int(start), min(int(end), size - 1) if end else size - 1
+
+
+@app.get("/videoplayback/{video_id}")
+async def videoplayback(video_id: str, request: Request, expire: int = 0):
+    """
+    Deterministic bytes for a video, with Range support; 403 once `expire`
+    has passed, like an expired googlevideo URL
+    """
+    if expire < time.time():
+        return Response(status_code=403)
+
+    size = config.stream_bytes
+    block = hashlib.sha256(video_id.encode()).digest() * (CHUNK_SIZE // 32)
+
+    byte_range = _parse_range(request.headers.get("range"), size)
+    start, end = byte_range or (0, size - 1)
+    if start > end:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+    offset = start % len(block)
+    body = (block[offset:] + block * ((end - start) // len(block) + 1))[:end - start + 1]
+    headers = {"Accept-Ranges": "bytes", "Content-Length": str(len(body))}
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(body, status_code=206 if byte_range else 200, media_type="audio/mp4", headers=headers)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("FAKE_YOUTUBE_PORT", "8090")), log_level="warning")
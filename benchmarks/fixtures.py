@@ -0,0 +1,81 @@
+"""
+Seed a database with the benchmark catalog (see dataset.py):
+
+    python -m benchmarks.fixtures                        # DATABASE_URL (Postgres)
+    python -m benchmarks.fixtures --database-url sqlite+aiosqlite:///bench.sqlite3
+    python -m benchmarks.fixtures --playlists 2000 --videos-per-playlist 50 --reset
+
+Rows get ids 1..N in dataset order, matching Dataset.playlist_rows() /
+video_rows(), so Locust can address them without querying first.
+The API itself needs Postgres (upserts, advisory locks); a SQLite file is
+useful for inspecting the data set and for offline catalog experiments.
+"""
+import argparse
+import asyncio
+import os
+import time
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.models import Base, Playlist, Video
+from benchmarks.dataset import Dataset
+
+CHUNK_SIZE = 1000
+
+# Same column order as app.services.catalog (not imported: it builds the app's engine)
+PLAYLIST_FIELDS = ["id", "playlist_id", "name", "description", "thumbnail"]
+VIDEO_FIELDS = ["id", "video_id", "playlist_id", "title", "thumbnail", "duration"]
+
+
+def _chunks(rows):
+    for i in range(0, len(rows), CHUNK_SIZE):
+        yield rows[i:i + CHUNK_SIZE]
+
+
+async def seed(database_url: str, dataset: Dataset, reset: bool = False):
+    engine = create_async_engine(database_url)
+    start = time.perf_counter()
+
+    playlists = [dict(zip(PLAYLIST_FIELDS, row)) for row in dataset.playlist_rows()]
+    videos = [dict(zip(VIDEO_FIELDS, row)) for row in dataset.video_rows()]
+
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        for chunk in _chunks(playlists):
+            await conn.execute(insert(Playlist), chunk)
+        for chunk in _chunks(videos):
+            await conn.execute(insert(Video), chunk)
+
+        # Explicit ids don't advance Postgres sequences; later syncs insert after them
+        if engine.dialect.name == "postgresql":
+            for table in ("playlists", "videos"):
+                await conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                ))
+
+    await engine.dispose()
+    print(f"🌱 Seeded {len(playlists)} playlists and {len(videos)} videos "
+          f"in {time.perf_counter() - start:.1f}s ({engine.dialect.name}, seed {dataset.seed})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the benchmark catalog")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL") or os.getenv("DATABASE_URL"))
+    parser.add_argument("--playlists", type=int, default=None)
+    parser.add_argument("--videos-per-playlist", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("no --database-url and DATABASE_URL is not set")
+
+    dataset = Dataset(args.playlists, args.videos_per_playlist, args.seed)
+    asyncio.run(seed(args.database_url.split("?")[0], dataset, args.reset))
+
+
+if __name__ == "__main__":
+    main()
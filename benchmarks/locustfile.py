@@ -0,0 +1,141 @@
+"""
+Load-test scenarios against `python -m benchmarks.serve` on a DB seeded by
+`python -m benchmarks.fixtures` (same BENCH_* settings for all three):
+
+    locust -f benchmarks/locustfile.py --host http://127.0.0.1:8000 \\
+        --headless -u 200 -r 20 -t 5m --csv bench_results/run
+
+Each user class is one behaviour; their weights set the traffic mix.
+Requests are named by route template so stats group per endpoint.
+"""
+import itertools
+import os
+import random
+from locust import HttpUser, task, between, constant
+from benchmarks.dataset import SEARCH_QUERIES
+
+PLAYLISTS = int(os.getenv("BENCH_PLAYLISTS", "500"))
+VIDEOS = PLAYLISTS * int(os.getenv("BENCH_VIDEOS_PER_PLAYLIST", "40"))
+
+# Zipf-like popularity: a few lessons get most of the plays, which is
+# what makes the URL cache and prefetcher matter
+_rng = random.Random(int(os.getenv("BENCH_SEED", "42")))
+_ranking = list(range(1, VIDEOS + 1))
+_rng.shuffle(_ranking)
+_cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, VIDEOS + 1)))
+
+
+def popular_video():
+    return random.choices(_ranking, cum_weights=_cum_weights)[0]
+
+
+# Appended to the request name of rate limited / shed responses
+REJECTED = " [rejected]"
+
+
+def count_rejections(response):
+    """
+    429 / 503 are an expected outcome under stress, but not plays: report
+    them under their own name so the play latency rows only hold requests
+    that were actually served
+    """
+    if response.status_code in (429, 503):
+        response.request_meta["name"] += REJECTED
+        response.success()
+
+
+class ETagClient:
+    """
+    Remembers ETags per URL and revalidates like a browser cache would
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.etags = {}
+
+    def get(self, url, name):
+        headers = {"If-None-Match": self.etags[url]} if url in self.etags else {}
+        with self.client.get(url, name=name, headers=headers, catch_response=True) as response:
+            if response.status_code in (200, 304):
+                if "ETag" in response.headers:
+                    self.etags[url] = response.headers["ETag"]
+                response.success()
+            return response
+
+
+class Browser(HttpUser):
+    """Scrolls through the playlist list page by page"""
+    weight = 4
+    wait_time = between(1, 4)
+
+    def on_start(self):
+        self.cache = ETagClient(self.client)
+
+    @task
+    def browse(self):
+        url = "/playlists/?limit=100"
+        for _ in range(random.randint(1, 3)):
+            response = self.cache.get(url, "/playlists/")
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            url = f"/playlists/?limit=100&after={cursor}"
+
+
+class PlaylistOpener(HttpUser):
+    """Opens a playlist and loads its lessons"""
+    weight = 4
+    wait_time = between(1, 4)
+
+    def on_start(self):
+        self.cache = ETagClient(self.client)
+
+    @task
+    def open_playlist(self):
+        playlist_id = random.randint(1, PLAYLISTS)
+        self.cache.get(f"/playlists/{playlist_id}", "/playlists/{playlist_id}")
+        self.cache.get(f"/videos/playlist/{playlist_id}?limit=100", "/videos/playlist/{playlist_id}")
+
+
+class Listener(HttpUser):
+    """Presses play: resolves a playback URL, mostly for popular lessons"""
+    weight = 3
+    wait_time = between(2, 8)
+
+    @task(3)
+    def play_audio(self):
+        with self.client.get(f"/videos/{popular_video()}/audio", name="/videos/{video_id}/audio",
+                             catch_response=True) as response:
+            count_rejections(response)
+
+    @task(1)
+    def play_video(self):
+        with self.client.get(f"/videos/{popular_video()}/play", name="/videos/{video_id}/play",
+                             catch_response=True) as response:
+            count_rejections(response)
+
+
+class Searcher(HttpUser):
+    """Types into the search box: one request per debounced keystroke burst"""
+    weight = 2
+    wait_time = between(1, 3)
+
+    @task
+    def search(self):
+        query = random.choice(SEARCH_QUERIES)
+        for length in sorted({2, max(2, len(query) // 2), len(query)}):
+            self.client.get("/search/", params={"q": query[:length]}, name="/search/")
+
+
+class SyncTrigger(HttpUser):
+    """Admin re-triggering the sync while readers keep going"""
+    fixed_count = 1
+    wait_time = constant(30)
+
+    @task
+    def sync(self):
+        response = self.client.post("/sync/", name="/sync/")
+        if response.status_code == 202:
+            job_id = response.json().get("job_id")
+            if job_id:
+                self.client.get(f"/sync/{job_id}", name="/sync/{job_id}")
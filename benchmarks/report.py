@@ -0,0 +1,163 @@
+"""
+Regression report: compares a run against a baseline and flags anything
+that got slower than the threshold.
+
+    # micro-benchmarks (pytest-benchmark JSON, e.g. from --benchmark-json)
+    python -m benchmarks.report --micro baseline.json current.json
+    # load tests (Locust --csv prefix; reads <prefix>_stats.csv)
+    python -m benchmarks.report --load bench_results/base bench_results/run
+    # both, writing a Markdown report, failing on >10% regressions
+    python -m benchmarks.report --micro a.json b.json --load base run --threshold 0.10 --output report.md
+
+Exits with status 1 when something regressed, so it can gate a change.
+"""
+import argparse
+import csv
+import json
+import sys
+
+# Load-test columns compared per endpoint: (csv column, label, higher is better)
+LOAD_COLUMNS = [
+    ("50%", "p50 ms", False),
+    ("95%", "p95 ms", False),
+    ("99%", "p99 ms", False),
+    ("Requests/s", "req/s", True),
+]
+
+# Rows of rate limited / shed requests (see locustfile.REJECTED): only
+# their rate is compared, and more of them is worse
+REJECTED_MARKER = "[rejected]"
+REJECTED_COLUMNS = [("Requests/s", "rejected/s", False)]
+
+
+def _change(before: float, after: float):
+    return (after - before) / before if before else 0.0
+
+
+def _verdict(change: float, threshold: float, higher_is_better: bool = False):
+    worse = -change if higher_is_better else change
+    if worse > threshold:
+        return "❌ regression"
+    if worse < -threshold:
+        return "✅ faster"
+    return ""
+
+
+def compare_micro(baseline_path: str, current_path: str, threshold: float):
+    """
+    Rows of (name, baseline median, current median, change, verdict); seconds
+    """
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            return {b["fullname"]: b["stats"] for b in json.load(f)["benchmarks"]}
+
+    baseline, current = load(baseline_path), load(current_path)
+    rows = []
+    for name in sorted(baseline.keys() | current.keys()):
+        if name not in baseline or name not in current:
+            rows.append((name, baseline.get(name, {}).get("median"), current.get(name, {}).get("median"), None,
+                         "new" if name in current else "removed"))
+            continue
+        before, after = baseline[name]["median"], current[name]["median"]
+        change = _change(before, after)
+        rows.append((name, before, after, change, _verdict(change, threshold)))
+    return rows
+
+
+def compare_load(baseline_prefix: str, current_prefix: str, threshold: float):
+    """
+    Rows of (endpoint, metric, baseline, current, change, verdict), including
+    the failure rate, which regresses on any absolute increase above threshold
+    """
+    def load(prefix):
+        with open(f"{prefix}_stats.csv", encoding="utf-8") as f:
+            return {f"{r['Type']} {r['Name']}".strip(): r for r in csv.DictReader(f)}
+
+    baseline, current = load(baseline_prefix), load(current_prefix)
+    rows = []
+    for name in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[name], current[name]
+        columns = REJECTED_COLUMNS if name.endswith(REJECTED_MARKER) else LOAD_COLUMNS
+        for column, label, higher_is_better in columns:
+            b, a = float(before[column] or 0), float(after[column] or 0)
+            change = _change(b, a)
+            rows.append((name, label, b, a, change, _verdict(change, threshold, higher_is_better)))
+
+        b_fail = _failure_rate(before)
+        a_fail = _failure_rate(after)
+        verdict = "❌ regression" if a_fail - b_fail > threshold / 10 else ""
+        rows.append((name, "failure %", b_fail * 100, a_fail * 100, None, verdict))
+
+    # Rejections the baseline never had
+    for name in sorted(current.keys() - baseline.keys()):
+        if name.endswith(REJECTED_MARKER):
+            rows.append((name, "rejected/s", 0.0, float(current[name]["Requests/s"] or 0), None, "❌ regression"))
+    return rows
+
+
+def _failure_rate(row):
+    requests = float(row["Request Count"] or 0)
+    return float(row["Failure Count"] or 0) / requests if requests else 0.0
+
+
+def _fmt_change(change):
+    return "" if change is None else f"{change:+.1%}"
+
+
+def _fmt_seconds(value):
+    if value is None:
+        return "-"
+    if value < 1e-3:
+        return f"{value * 1e6:.1f} µs"
+    if value < 1:
+        return f"{value * 1e3:.2f} ms"
+    return f"{value:.2f} s"
+
+
+def render(micro, load, threshold: float):
+    lines = [f"# Performance regression report (threshold {threshold:.0%})", ""]
+
+    if micro is not None:
+        lines += ["## Micro-benchmarks (median)", "",
+                  "| benchmark | baseline | current | change | |", "|---|---:|---:|---:|---|"]
+        for name, before, after, change, verdict in micro:
+            lines.append(f"| `{name}` | {_fmt_seconds(before)} | {_fmt_seconds(after)} | {_fmt_change(change)} | {verdict} |")
+        lines.append("")
+
+    if load is not None:
+        lines += ["## Load test", "",
+                  "| endpoint | metric | baseline | current | change | |", "|---|---|---:|---:|---:|---|"]
+        for name, metric, before, after, change, verdict in load:
+            lines.append(f"| `{name}` | {metric} | {before:.2f} | {after:.2f} | {_fmt_change(change)} | {verdict} |")
+        lines.append("")
+
+    regressions = sum(1 for row in (micro or []) + (load or []) if row[-1].startswith("❌"))
+    lines.append(f"**{regressions} regression(s)**" if regressions else "**No regressions**")
+    return "\n".join(lines) + "\n", regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare benchmark runs against a baseline")
+    parser.add_argument("--micro", nargs=2, metavar=("BASELINE_JSON", "CURRENT_JSON"))
+    parser.add_argument("--load", nargs=2, metavar=("BASELINE_PREFIX", "CURRENT_PREFIX"))
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    parser.add_argument("--output", help="also write the Markdown report to this file")
+    args = parser.parse_args()
+
+    if not args.micro and not args.load:
+        parser.error("nothing to compare: pass --micro and/or --load")
+
+    micro = compare_micro(*args.micro, args.threshold) if args.micro else None
+    load = compare_load(*args.load, args.threshold) if args.load else None
+    report, regressions = render(micro, load, args.threshold)
+
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Run the API against the local YouTube stand-in:
+
+    python -m benchmarks.fake_youtube &
+    python -m benchmarks.serve
+
+The sync talks to the fake Data API (YOUTUBE_API_BASE_URL) and yt-dlp is
+replaced by FakeYoutubeDL; everything else, including the database, is
+the real thing (see fixtures.py for seeding it).
+
+Per-client rate limiting is off by default: every Locust user comes from
+127.0.0.1, so they would all share one client bucket and most plays would
+be measured on the 429 path. Load shedding (503) stays on. Set
+RATE_LIMIT_ENABLED=true to benchmark the limiter itself.
+"""
+import os
+
+os.environ.setdefault("YOUTUBE_API_BASE_URL", os.getenv("FAKE_YOUTUBE_URL", "http://127.0.0.1:8090"))
+os.environ.setdefault("YT_API_KEY", "benchmark")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from benchmarks.fake_youtube import install_fake_ytdlp  # noqa: E402
+
+install_fake_ytdlp()
+
+from main import app  # noqa: E402
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        app,
+        host="127.0.0.1",
+        port=int(os.getenv("BENCH_PORT", "8000")),
+        log_level="warning",
+    )
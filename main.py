@@ -1,22 +1,52 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from app.api import playlists, videos, sync
+import asyncio
+from app.api import playlists, videos, sync, search, metrics
+from app.metrics import MetricsMiddleware, monitor_event_loop_lag
 from app.scheduler import start_scheduler
-from app.db.models import Base
-from app.db.session import engine
+from app.config import settings
+from app.db.migrate import migrate
+from app.services.extraction_pool import extraction_pool
+from app.services.youtube_api import youtube
+from app.services.stream_relay import stream_relay
+from app.services.audio_cache import audio_cache
+from app.services.catalog import catalog_store
+from app.services.url_cache import url_cache
+from app.services.admission import admission
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup code
+async def load_catalog():
     try:
-        # Create database tables
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("✅ Database tables created successfully")
+        # Catalog reads are served from memory from now on
+        await catalog_store.load(if_missing=True)
     except Exception as e:
-        print(f"⚠️  Warning: Could not connect to database on startup: {e}")
-        print("ℹ️  Check your Supabase connection and network connectivity")
-    
+        # The scheduler's catalog_refresh job tries again
+        print(f"⚠️  Warning: Could not load catalog, reads fall back to the database: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup code: nothing here waits on the database, so a worker is
+    # ready as soon as it's imported
+    # Schema changes ship with `python -m app.db.migrate`; this is a
+    # convenience for single-worker / development setups
+    if settings.DB_CREATE_TABLES:
+        try:
+            await migrate()
+            print("✅ Database schema is up to date")
+        except Exception as e:
+            print(f"⚠️  Warning: Could not connect to database on startup: {e}")
+            print("ℹ️  Check your Supabase connection and network connectivity")
+
+    url_cache.init()
+    admission.init()
+
+    # Find lectures already on disk (off the loop); plays stream until then
+    audio_scan = asyncio.create_task(audio_cache.scan()) if settings.AUDIO_CACHE_ENABLED else None
+
+    # Until the snapshot is in, reads go to the database
+    catalog_task = asyncio.create_task(load_catalog())
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+
     try:
         start_scheduler()
         print("✅ Scheduler started")
@@ -25,6 +55,14 @@ async def lifespan(app: FastAPI):
     
     yield
     # Optional: shutdown code here if you need to stop the scheduler
+    catalog_task.cancel()
+    if audio_scan:
+        audio_scan.cancel()
+    lag_monitor.cancel()
+    extraction_pool.shutdown()
+    await youtube.aclose()
+    await stream_relay.aclose()
+    await audio_cache.aclose()
 
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -38,8 +76,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # pagination cursor read by the frontend
 )
+# Per-route latency histograms for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Routers
 app.include_router(playlists.router)
 app.include_router(videos.router)
 app.include_router(sync.router)
+app.include_router(search.router)
+app.include_router(metrics.router)
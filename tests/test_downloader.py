@@ -0,0 +1,56 @@
+"""
+Extraction failures vs. videos YouTube won't serve: only the former may
+open the extractor circuit.
+"""
+import asyncio
+from collections import OrderedDict
+import pytest
+from app.services import downloader
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpen
+
+
+@pytest.fixture
+def circuit(monkeypatch):
+    breaker = CircuitBreaker(name="test", failure_threshold=3, error_rate=0.5, min_calls=10, window=60,
+                             open_seconds=30, half_open_probes=1)
+    monkeypatch.setattr(downloader, "extractor_circuit", breaker)
+    monkeypatch.setattr(downloader, "_unavailable", OrderedDict())
+    return breaker
+
+
+def _failing_extractor(monkeypatch, message: str):
+    calls = []
+
+    def extract_links(video_id):
+        calls.append(video_id)
+        raise Exception(message)
+
+    monkeypatch.setattr(downloader, "extract_links", extract_links)
+    return calls
+
+
+def test_unavailable_video_does_not_open_circuit(monkeypatch, circuit):
+    calls = _failing_extractor(monkeypatch, "ERROR: [youtube] gone0000001: Video unavailable. "
+                                            "This video has been removed by the uploader")
+
+    for _ in range(5):
+        with pytest.raises(downloader.VideoUnavailable):
+            asyncio.run(downloader.resolve_video_links("gone0000001"))
+
+    assert circuit.state == "closed"
+    assert circuit.failures == 0
+    # Negative-cached after the first attempt
+    assert calls == ["gone0000001"]
+
+
+def test_extractor_failures_open_circuit(monkeypatch, circuit):
+    calls = _failing_extractor(monkeypatch, "ERROR: [youtube] broken: Sign in to confirm you're not a bot")
+
+    for i in range(3):
+        assert asyncio.run(downloader.resolve_video_links(f"broken{i:05d}")) == (None, None)
+
+    assert circuit.failures == 3
+    assert circuit.is_open
+    with pytest.raises(CircuitOpen):
+        asyncio.run(downloader.resolve_video_links("healthy0001"))
+    assert len(calls) == 3
@@ -0,0 +1,31 @@
+"""
+Query tokens go through the same article stripping as indexed ones.
+"""
+from app.services.search import SearchIndex
+
+PLAYLISTS = [(1, "PL1", "دروس الصلاة", None, "thumb")]
+VIDEOS = [
+    (10, "vid0000010", 1, "أحكام الصلاة", "thumb", 600),
+    (11, "vid0000011", 1, "فضل الصيام", "thumb", 600),
+]
+
+
+def _ids(index, query):
+    results, total = index.search(query)
+    assert total == len(results)
+    return {row[0] for _, _, row in results}
+
+
+def test_article_variants_find_the_same_documents():
+    index = SearchIndex(PLAYLISTS, VIDEOS)
+
+    expected = _ids(index, "الصلاة")
+    assert expected == {1, 10}
+    for query in ("صلاه", "بالصلاة", "والصلاه", "للصلاة"):
+        assert _ids(index, query) == expected, query
+
+
+def test_article_prefix_of_last_word():
+    index = SearchIndex(PLAYLISTS, VIDEOS)
+
+    assert _ids(index, "بالصي") == {11}